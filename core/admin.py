@@ -16,13 +16,20 @@ from core.models import (
     ConversationProcessingState,
     RoomDailySummaryCount,
     RoomSummary,
+    RoomSummaryUsage,
     TodoList,
+    MatrixSyncState,
+    WorkerHeartbeat,
+    SummaryJob,
+    SubscriberCommandCursor,
+    LLMResponseCache,
 )
+from core.services.usage import UsageReportService
 
 
 @admin.register(GeneralSettings)
 class GeneralSettingsAdmin(admin.ModelAdmin):
-    list_display = ("id", "llm_model")
+    list_display = ("id", "llm_model", "light_llm_model")
 
     def has_add_permission(self, request):
         return False
@@ -58,8 +65,18 @@ class RoomAdmin(admin.ModelAdmin):
 
 @admin.register(RoomCheckLog)
 class RoomCheckLogAdmin(admin.ModelAdmin):
-    list_display = ("room", "checked_at", "summary")
-    list_filter = ("checked_at",)
+    list_display = (
+        "room",
+        "checked_at",
+        "summary",
+        "model",
+        "prompt_tokens",
+        "completion_tokens",
+        "cost",
+        "llm_latency_ms",
+        "total_latency_ms",
+    )
+    list_filter = ("checked_at", "model")
     search_fields = ("room__room_id", "room__name", "summary")
     readonly_fields = ("checked_at",)
     ordering = ("-checked_at",)
@@ -99,6 +116,7 @@ class PlanAdmin(admin.ModelAdmin):
         "billing_period",
         "number_of_rooms",
         "daily_summary_quota_per_room",
+        "llm_weight",
         "version",
         "is_active",
         "created_at",
@@ -179,11 +197,26 @@ class RoomSummaryAdmin(admin.ModelAdmin):
         "summary_preview",
         "needs_more_information",
         "message_count",
+        "model",
+        "estimated_prompt_tokens",
+        "prompt_tokens",
+        "completion_tokens",
+        "cost",
+        "llm_latency_ms",
+        "total_latency_ms",
         "is_sent",
         "sent_at",
         "created_at",
     )
-    list_filter = ("needs_more_information", "sent_at", "send_failed_at", "created_at")
+    list_filter = (
+        "needs_more_information",
+        "is_precomputed",
+        "is_degraded",
+        "model",
+        "sent_at",
+        "send_failed_at",
+        "created_at",
+    )
     search_fields = ("room__room_id", "room__room_name", "summary", "send_error")
     readonly_fields = ("created_at", "sent_at", "send_failed_at")
     ordering = ("-created_at",)
@@ -204,6 +237,38 @@ class RoomSummaryAdmin(admin.ModelAdmin):
     is_sent.short_description = "Sent"
 
 
+@admin.register(RoomSummaryUsage)
+class RoomSummaryUsageAdmin(admin.ModelAdmin):
+    """LLM spend and latency per day, subscriber and room of the filtered summaries."""
+
+    change_list_template = "admin/core/roomsummaryusage/change_list.html"
+    date_hierarchy = "created_at"
+    list_filter = ("model", "is_precomputed", "is_degraded", "room__subscriber")
+    search_fields = ("room__room_id", "room__room_name", "room__subscriber__full_name")
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            queryset = response.context_data["cl"].queryset
+        except (AttributeError, KeyError):
+            # Redirects and error pages have no changelist
+            return response
+
+        report = UsageReportService()
+        response.context_data.update(
+            {
+                "usage_totals": report.totals(queryset),
+                "usage_by_day": report.aggregate(queryset, "day", limit=31),
+                "usage_by_subscriber": report.aggregate(queryset, "subscriber", limit=50),
+                "usage_by_room": report.aggregate(queryset, "room", limit=50),
+            }
+        )
+        return response
+
+
 @admin.register(TodoList)
 class TodoListAdmin(admin.ModelAdmin):
     list_display = (
@@ -223,3 +288,53 @@ class TodoListAdmin(admin.ModelAdmin):
         return obj.description[:80] + "..." if len(obj.description) > 80 else obj.description
 
     description_preview.short_description = "Description"
+
+
+@admin.register(MatrixSyncState)
+class MatrixSyncStateAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "next_batch", "updated_at")
+    search_fields = ("name",)
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(WorkerHeartbeat)
+class WorkerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = ("worker_id", "heartbeat_at", "started_at")
+    readonly_fields = ("started_at",)
+    ordering = ("worker_id",)
+
+
+@admin.register(SummaryJob)
+class SummaryJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "subscriber",
+        "kind",
+        "room",
+        "status",
+        "attempts",
+        "available_at",
+        "locked_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "kind", "created_at")
+    search_fields = ("subscriber__full_name", "room__room_name", "last_error")
+    readonly_fields = ("created_at", "updated_at", "finished_at")
+    ordering = ("-created_at",)
+
+
+@admin.register(SubscriberCommandCursor)
+class SubscriberCommandCursorAdmin(admin.ModelAdmin):
+    list_display = ("id", "subscriber", "room_id", "last_event_id", "updated_at")
+    search_fields = ("subscriber__full_name", "room_id", "last_event_id")
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ("id", "key", "model", "hit_count", "last_hit_at", "expires_at", "created_at")
+    list_filter = ("model", "created_at")
+    search_fields = ("key",)
+    readonly_fields = ("created_at",)
+    ordering = ("-created_at",)
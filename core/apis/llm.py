@@ -1,3 +1,5 @@
+from typing import Optional
+
 from ninja import Router
 from ninja.errors import HttpError
 
@@ -9,6 +11,9 @@ from core.schemas.llm import (
     SendSummaryRequest,
 )
 from core.services.llm import LLMService
+from core.services.llm_cache import LLMCacheService
+from core.services.llm_hedging import LLMHedger
+from core.services.llm_provider import provider_stats
 from core.services.matrix import MatrixService
 
 router = Router()
@@ -48,11 +53,11 @@ def construct_llm_context(request, payload: LLMContextRequest):
 
 
 @router.post("/summarize", response=LLMProcessResponse)
-def summarize_context(request, payload: LLMContextResponse, model: str = "gpt-5.1"):
+def summarize_context(request, payload: LLMContextResponse, model: Optional[str] = None):
     """
     Process LLM context and get summary, reply, and action items.
 
-    Sends the context to NanoGPT and returns structured output.
+    Sends the context to the model's LLM provider and returns structured output.
 
     Body:
         messages: List of message objects
@@ -62,7 +67,7 @@ def summarize_context(request, payload: LLMContextResponse, model: str = "gpt-5.
         output_format: Expected output format
 
     Query params:
-        model: LLM model to use (default: gpt-4o-mini)
+        model: LLM model to use (default: the model selected in settings)
     """
     llm_service = LLMService()
 
@@ -128,3 +133,22 @@ def send_summary(request, payload: SendSummaryRequest):
         return {"success": True, "event_id": result.get("event_id")}
     except Exception as e:
         raise HttpError(500, f"Failed to send message: {str(e)}")
+
+
+@router.get("/stats", auth=bearer_auth)
+def llm_stats(request):
+    """
+    Runtime counters for the LLM layer in this process.
+
+    Returns:
+        cache: hits, misses, hit_rate and stored entry count
+        hedging: requests, hedged, errors, wins per provider:model,
+            hedge_rate and current hedge delay per model
+        limiter: per provider concurrency limit, in_flight, queued,
+            blocked_for_seconds (Retry-After) and throttle counters
+    """
+    return {
+        "cache": LLMCacheService.stats(),
+        "hedging": LLMHedger.stats(),
+        "limiter": provider_stats(),
+    }
@@ -0,0 +1,172 @@
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from core.models import ConversationProcessingState, SubscriberRoom
+from core.services.llm import LLMService
+from core.services.llm_limiter import llm_tenant
+from core.services.matrix import MatrixService, RoomService
+
+
+class Command(BaseCommand):
+    help = "Long-running worker that summarizes monitored rooms ahead of requests"
+
+    running = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=300,
+            help="Seconds between scans of all monitored rooms",
+        )
+        parser.add_argument(
+            "--min-messages",
+            type=int,
+            default=20,
+            help="Summarize once a room has at least this many new messages",
+        )
+        parser.add_argument(
+            "--max-age-minutes",
+            type=int,
+            default=60,
+            help="Summarize any new messages once the oldest is this old",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Maximum number of rooms summarized in parallel",
+        )
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.min_messages = options["min_messages"]
+        self.max_age = timedelta(minutes=options["max_age_minutes"])
+        self.concurrency = max(1, options["concurrency"])
+
+        self.stdout.write("Pre-summarizer started")
+
+        # Initialize services
+        self.matrix_service = MatrixService()
+        self.matrix_service.login()
+        self.stdout.write("Logged in to Matrix")
+
+        self.room_service = RoomService()
+        self.llm_service = LLMService()
+
+        while self.running:
+            try:
+                close_old_connections()
+                self.run_once()
+            except Exception as e:
+                self.stderr.write(f"Error: {str(e)}")
+
+            # Sleep in short steps so a stop signal is honoured promptly
+            deadline = time.monotonic() + options["interval"]
+            while self.running and time.monotonic() < deadline:
+                time.sleep(1)
+
+        self.stdout.write("Pre-summarizer stopped")
+
+    def stop(self, *args):
+        self.running = False
+
+    def run_once(self):
+        subscribers = self.matrix_service.get_active_subscribers()
+        rooms = list(
+            SubscriberRoom.objects.filter(
+                subscriber__in=subscribers,
+                is_active=True,
+            ).select_related("subscriber")
+        )
+
+        if not rooms:
+            return
+
+        access_token = self.matrix_service.get_access_token()
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="presummary"
+        ) as executor:
+            results = list(
+                executor.map(lambda room: self.presummarize_room(room, access_token), rooms)
+            )
+
+        built = sum(1 for result in results if result)
+        if built:
+            self.stdout.write(self.style.SUCCESS(f"Pre-summarized {built} room(s)"))
+
+    def presummarize_room(self, room, access_token) -> bool:
+        """Build a warm summary for one room if it has accumulated enough. Returns True if built."""
+        state = None
+        try:
+            state, _ = ConversationProcessingState.objects.get_or_create(
+                room=room,
+                defaults={"status": ConversationProcessingState.STATUS_IDLE},
+            )
+
+            started_at = time.time()
+            synced_at = state.last_message_synced_at
+            messages = self.llm_service.fetch_new_messages(
+                state, self.room_service, access_token
+            )
+            if not self.is_due(messages):
+                return False
+
+            if not self.llm_service.claim_room(state):
+                # Being summarized on request right now
+                return False
+            if state.last_message_synced_at != synced_at:
+                # Summarized on request since the fetch; the next pass sees the rest
+                self.llm_service.release_room(state)
+                return False
+
+            warm_summary = self.llm_service.get_warm_summary(room)
+            context = self.llm_service.build_llm_context_for_summary(
+                state=state,
+                room_service=self.room_service,
+                access_token=access_token,
+                messages=messages,
+                base_summary=warm_summary,
+                started_at=started_at,
+            )
+
+            subscriber = room.subscriber
+            with llm_tenant(f"subscriber:{subscriber.id}", subscriber.llm_weight):
+                self.llm_service.process_room(
+                    state=state,
+                    context=context,
+                    base_summary=warm_summary,
+                    precomputed=True,
+                )
+            return True
+
+        except Exception as e:
+            self.stderr.write(f"Failed to pre-summarize room {room.id}: {str(e)}")
+            if state and state.status == ConversationProcessingState.STATUS_PROCESSING:
+                state.status = ConversationProcessingState.STATUS_FAILED
+                state.failure_reason = str(e)
+                state.save(update_fields=["status", "failure_reason", "updated_at"])
+            return False
+
+        finally:
+            # Runs on a pool thread, which owns its own DB connection
+            connections.close_all()
+
+    def is_due(self, messages) -> bool:
+        """Whether enough new messages, or old enough ones, have accumulated."""
+        if not messages:
+            return False
+        if len(messages) >= self.min_messages:
+            return True
+
+        oldest = datetime.fromisoformat(messages[0]["timestamp"])
+        return timezone.now() - oldest >= self.max_age
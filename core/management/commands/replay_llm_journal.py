@@ -0,0 +1,220 @@
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.llm import LLMService
+from core.services.llm_journal import LLMJournal, read_journal
+
+
+class ReplayJournal(LLMJournal):
+    """Keeps the journal entry of the replayed call instead of writing it."""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = True
+        self.entry = None
+
+    def write(self, entry: Dict[str, Any]):
+        self.entry = entry
+
+
+class ReplayLLMService(LLMService):
+    """
+    LLMService for replaying one journal record, without the cache.
+
+    With stand_in, the provider is replaced by a local stand-in that answers
+    with the recorded response (after the recorded latency if
+    stand_in_latency), so only the local side of a call is measured:
+    packing, prompt building and parsing. Repair calls are skipped then.
+    """
+
+    def __init__(
+        self,
+        record: Dict[str, Any],
+        stand_in: bool = False,
+        stand_in_latency: bool = False,
+    ):
+        super().__init__()
+        self.cache.enabled = False
+        self.journal = ReplayJournal()
+        self.record = record
+        self.stand_in = stand_in
+        self.stand_in_latency = stand_in_latency
+        self.repair_enabled = not stand_in
+
+    def complete(self, model, prompt_messages, schema=None):
+        if not self.stand_in:
+            return super().complete(model, prompt_messages, schema)
+
+        if self.record.get("response") is None:
+            raise RuntimeError(f"Recorded call failed: {self.record.get('error')}")
+        if self.stand_in_latency:
+            time.sleep((self.record.get("latency_ms") or 0) / 1000)
+        usage = {"completion_tokens": self.record.get("completion_tokens")}
+        return self.record["response"], usage, model
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay an LLM journal against a local stand-in or the configured "
+        "provider and report latency, tokens and parse failures"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Journal files, or directories of them",
+        )
+        parser.add_argument(
+            "--model",
+            help="Replay every call with this model instead of the recorded one",
+        )
+        parser.add_argument(
+            "--stand-in",
+            action="store_true",
+            help="Answer with the recorded responses instead of calling the provider",
+        )
+        parser.add_argument(
+            "--stand-in-latency",
+            action="store_true",
+            help="With --stand-in, wait the recorded latency before answering",
+        )
+        parser.add_argument(
+            "--recorded-only",
+            action="store_true",
+            help="Only report the journal itself, without replaying",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Replay at most this many calls",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Calls replayed in parallel",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON",
+        )
+
+    def handle(self, *args, **options):
+        records = []
+        for record in read_journal(options["paths"]):
+            records.append(record)
+            if options["limit"] and len(records) >= options["limit"]:
+                break
+
+        if not records:
+            raise CommandError("No journal records found")
+
+        report = {"recorded": self.summarize(records)}
+
+        if not options["recorded_only"]:
+            self.stdout.write(f"Replaying {len(records)} calls...")
+
+            def replay(record):
+                return self.replay(
+                    record,
+                    options["model"],
+                    options["stand_in"],
+                    options["stand_in_latency"],
+                )
+
+            with ThreadPoolExecutor(max_workers=max(1, options["concurrency"])) as executor:
+                report["replayed"] = self.summarize(list(executor.map(replay, records)))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for name, groups in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name.capitalize()))
+            self.write_table(groups)
+
+    def replay(
+        self,
+        record: Dict[str, Any],
+        model: Optional[str],
+        stand_in: bool,
+        stand_in_latency: bool,
+    ) -> Dict[str, Any]:
+        """Run one recorded context through the current LLMService code."""
+        service = ReplayLLMService(record, stand_in, stand_in_latency)
+        model = model or record["model"]
+
+        started = time.monotonic()
+        try:
+            service.process(record["context"], model=model)
+        except Exception:
+            pass
+        latency_ms = round((time.monotonic() - started) * 1000)
+
+        # Same fields as the journal entry, but timed over the whole call
+        entry = service.journal.entry or {
+            "model": model,
+            "prompt_version": service.PROMPT_VERSION,
+            "parsed": False,
+            "error": "no completion request made",
+        }
+        entry.pop("context", None)
+        entry.pop("response", None)
+        entry["latency_ms"] = latency_ms
+        return entry
+
+    def summarize(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Aggregate calls per (model, prompt version)."""
+        groups = {}
+        for call in calls:
+            key = (call.get("model") or "-", str(call.get("prompt_version") or "-"))
+            groups.setdefault(key, []).append(call)
+
+        summary = []
+        for (model, prompt_version), group in sorted(groups.items()):
+            latencies = sorted(call["latency_ms"] for call in group if not call.get("error"))
+            summary.append(
+                {
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "calls": len(group),
+                    "errors": sum(1 for call in group if call.get("error")),
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "p99_ms": percentile(latencies, 99),
+                    "prompt_tokens": sum(call.get("prompt_tokens") or 0 for call in group),
+                    "estimated_prompt_tokens": sum(
+                        call.get("estimated_prompt_tokens") or 0 for call in group
+                    ),
+                    "completion_tokens": sum(call.get("completion_tokens") or 0 for call in group),
+                    "parse_failure_rate": round(
+                        sum(1 for call in group if not call.get("parsed")) / len(group), 4
+                    ),
+                }
+            )
+        return summary
+
+    def write_table(self, groups: List[Dict[str, Any]]):
+        columns = list(groups[0]) if groups else []
+        rows = [[str(group[column]) for column in columns] for group in groups]
+        widths = [
+            max(len(column), *(len(row[i]) for row in rows))
+            for i, column in enumerate(columns)
+        ]
+        self.stdout.write("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        for row in rows:
+            self.stdout.write("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(len(values) * pct / 100) - 1)]
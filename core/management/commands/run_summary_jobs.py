@@ -0,0 +1,156 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.db import close_old_connections, connections
+
+from core.management.commands.summarize_rooms import Command as SummarizeRoomsCommand
+from core.models import SummaryJob
+from core.services.llm import LLMService
+from core.services.matrix import MatrixService, RoomService
+from core.worker import SummaryJobQueue
+
+
+class Command(SummarizeRoomsCommand):
+    help = "Long-running executor that claims and runs queued summary jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Number of jobs executed in parallel by this process",
+        )
+        parser.add_argument(
+            "--room-concurrency",
+            type=int,
+            default=3,
+            help="Maximum number of rooms summarized in parallel per job",
+        )
+        parser.add_argument(
+            "--visibility-timeout",
+            type=int,
+            default=600,
+            help="Seconds before a running job with no progress can be reclaimed",
+        )
+        parser.add_argument(
+            "--backoff-seconds",
+            type=int,
+            default=30,
+            help="Base retry delay, doubled after every failed attempt",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=None,
+            help="Executor name recorded on claimed jobs (default: host-pid)",
+        )
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.room_concurrency = max(1, options["room_concurrency"])
+        # Jobs are executed here, never re-queued
+        self.job_queue = None
+        self.queue = SummaryJobQueue(
+            worker_id=options["worker_id"] or f"{socket.gethostname()}-{os.getpid()}",
+            visibility_timeout=options["visibility_timeout"],
+            backoff_seconds=options["backoff_seconds"],
+        )
+
+        self.stdout.write(f"Job executor started as {self.queue.worker_id}")
+
+        # Initialize services
+        self.matrix_service = MatrixService()
+        self.matrix_service.login()
+        self.stdout.write("Logged in to Matrix")
+
+        self.room_service = RoomService()
+        self.llm_service = LLMService()
+
+        threads = [
+            threading.Thread(
+                target=self.work_loop,
+                args=(options["poll_interval"],),
+                name=f"job-{i}",
+            )
+            for i in range(max(1, options["concurrency"]))
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Keep the main thread free to receive signals
+        while self.running:
+            time.sleep(1)
+
+        self.stdout.write("Waiting for running jobs...")
+        for thread in threads:
+            thread.join()
+        self.stdout.write("Job executor stopped")
+
+    def work_loop(self, poll_interval):
+        while self.running:
+            try:
+                close_old_connections()
+                job = self.queue.claim()
+                if not job:
+                    time.sleep(poll_interval)
+                    continue
+                self.run_job(job)
+            except Exception as e:
+                self.stderr.write(f"Error: {str(e)}")
+                time.sleep(poll_interval)
+
+        connections.close_all()
+
+    def run_job(self, job):
+        subscriber = job.subscriber
+        rooms = self.queue.get_rooms(job)
+
+        self.stdout.write(
+            f"Running {job.kind} job {job.id} for subscriber {subscriber.id} "
+            f"(attempt {job.attempts}/{job.max_attempts})"
+        )
+
+        try:
+            failed_rooms = self.process_summaries(subscriber, rooms)
+        except Exception as e:
+            self.handle_job_failure(job, str(e))
+            return
+
+        if job.kind == SummaryJob.KIND_ROOM and failed_rooms:
+            self.handle_job_failure(job, f"Failed to summarize room {job.room_id}")
+            return
+
+        self.queue.complete(job)
+
+        # Retry the rooms of a summary-all that failed as their own room jobs
+        for room in failed_rooms:
+            self.queue.enqueue(
+                subscriber,
+                SummaryJob.KIND_ROOM,
+                room=room,
+                delay=self.queue.backoff_seconds,
+                attempts=job.attempts,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Finished job {job.id}"))
+
+    def handle_job_failure(self, job, error):
+        self.stderr.write(f"Job {job.id} failed: {error}")
+
+        if self.queue.fail(job, error):
+            return
+
+        self.matrix_service.send_message(
+            room_id=job.subscriber.matrix_room_id,
+            body="Sorry, I couldn't prepare that summary. Please try again later.",
+        )
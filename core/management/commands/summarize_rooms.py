@@ -1,22 +1,34 @@
 import re
 import signal
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import close_old_connections
+from django.db import close_old_connections, connections
 from django.db.models import F
 from django.utils import timezone
 
 from core.models import (
     ConversationProcessingState,
+    MatrixSyncState,
     RoomDailySummaryCount,
     RoomSummary,
+    SubscriberCommandCursor,
     SubscriberRoom,
+    SummaryJob,
     TodoList,
 )
-from core.services.llm import LLMService
-from core.services.matrix import MatrixService, RoomService
+from core.services.llm import LLMService, RoomBusyError
+from core.services.llm_limiter import llm_tenant, with_tenant
+from core.services.matrix import MatrixService, ProgressiveMessage, RoomService
+from core.worker import (
+    PollScheduler,
+    ShardCoordinator,
+    SubscriberDispatcher,
+    SummaryJobQueue,
+)
 
 
 class Command(BaseCommand):
@@ -25,6 +37,16 @@ class Command(BaseCommand):
     running = True
     FRIDAY_USER_ID = "@friday:matrix.tirta.me"
     SUMMARY_COOLDOWN_MINUTES = 15
+    SYNC_STATE_NAME = "summarize_rooms"
+    CURSOR_PAGE_SIZE = 50
+
+    # How long a requested summary waits for a background run on the room
+    CLAIM_WAIT_SECONDS = 120
+
+    # Outcomes of summarize_room
+    ROOM_SENT = "sent"
+    ROOM_EMPTY = "empty"
+    ROOM_FAILED = "failed"
 
     # Command patterns
     COMMANDS = {
@@ -36,11 +58,98 @@ class Command(BaseCommand):
         "todo_room": r"^todo\s+(\S+)$",
     }
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=["poll", "sync"],
+            default="poll",
+            help="poll: fetch each subscriber room every loop; "
+            "sync: long-poll Matrix /sync and only handle rooms with new events",
+        )
+        parser.add_argument(
+            "--sync-timeout",
+            type=int,
+            default=30000,
+            help="Long-poll timeout in milliseconds for sync mode",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Maximum number of subscribers processed in parallel",
+        )
+        parser.add_argument(
+            "--room-concurrency",
+            type=int,
+            default=3,
+            help="Maximum number of rooms summarized in parallel per request",
+        )
+        parser.add_argument(
+            "--sharded",
+            action="store_true",
+            help="Partition subscribers across all running replicas",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=None,
+            help="Stable replica name for sharded mode (default: host-pid-random)",
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=int,
+            default=30,
+            help="Seconds without a heartbeat before a replica is considered dead",
+        )
+        parser.add_argument(
+            "--min-interval",
+            type=float,
+            default=1.0,
+            help="Poll mode: seconds between polls of a recently active subscriber",
+        )
+        parser.add_argument(
+            "--max-interval",
+            type=float,
+            default=60.0,
+            help="Poll mode: upper bound on the poll interval of an idle subscriber",
+        )
+        parser.add_argument(
+            "--backoff-factor",
+            type=float,
+            default=2.0,
+            help="Poll mode: interval multiplier after each poll with no new message",
+        )
+        parser.add_argument(
+            "--enqueue-summaries",
+            action="store_true",
+            help="Queue summary requests as SummaryJobs for run_summary_jobs "
+            "instead of summarizing inline",
+        )
+
     def handle(self, *args, **options):
         signal.signal(signal.SIGTERM, self.stop)
         signal.signal(signal.SIGINT, self.stop)
 
-        self.stdout.write("Worker started")
+        self.mode = options["mode"]
+        self.sync_timeout = options["sync_timeout"]
+        self.room_concurrency = max(1, options["room_concurrency"])
+        self.job_queue = SummaryJobQueue() if options["enqueue_summaries"] else None
+        self.scheduler = PollScheduler(
+            min_interval=options["min_interval"],
+            max_interval=options["max_interval"],
+            backoff_factor=options["backoff_factor"],
+        )
+
+        self.shard = None
+        if options["sharded"]:
+            self.shard = ShardCoordinator(
+                worker_id=options["worker_id"],
+                lease_seconds=options["lease_seconds"],
+            )
+            self.shard.start()
+
+        self.stdout.write(f"Worker started ({self.mode} mode)")
+        if self.shard:
+            self.stdout.write(f"Sharding enabled as {self.shard.worker_id}")
 
         # Initialize services
         self.matrix_service = MatrixService()
@@ -49,51 +158,258 @@ class Command(BaseCommand):
 
         self.room_service = RoomService()
         self.llm_service = LLMService()
+        self.dispatcher = SubscriberDispatcher(
+            max_workers=max(1, options["concurrency"]),
+            on_error=self.handle_subscriber_error,
+        )
+        # Subscribers whose command cursor was read since this replica took them on
+        self.caught_up = set()
 
         while self.running:
             try:
                 close_old_connections()
+                if self.mode == "sync":
+                    # The long-poll itself is the wait between iterations
+                    self.run_sync_once()
+                    continue
                 self.run_once()
             except Exception as e:
                 self.stderr.write(f"Error: {str(e)}")
+                time.sleep(5)
+                continue
+
+            # Sleep until the next subscriber is due, bounded so new
+            # subscribers are noticed within one max interval
+            time.sleep(
+                min(
+                    max(self.scheduler.seconds_until_next(), self.scheduler.min_interval / 4),
+                    self.scheduler.max_interval,
+                )
+            )
 
-            time.sleep(5)
-
+        self.stdout.write("Waiting for in-flight subscribers...")
+        self.dispatcher.shutdown(wait=True)
+        if self.shard:
+            self.shard.stop()
         self.stdout.write("Worker stopped")
 
     def stop(self, *args):
         self.running = False
 
+    def get_owned_subscribers(self):
+        """Active subscribers this replica is responsible for."""
+        subscribers = self.matrix_service.get_active_subscribers()
+        if not self.shard:
+            return subscribers
+        return [s for s in subscribers if self.shard.owns(s.id)]
+
     def run_once(self):
         # Get all active subscribers with matrix_room_id
-        subscribers = self.matrix_service.get_active_subscribers()
+        subscribers = self.get_owned_subscribers()
 
         if not subscribers:
             self.stdout.write("No active subscribers found")
             return
 
+        due_ids = set(self.scheduler.due(s.id for s in subscribers))
+
         for subscriber in subscribers:
-            try:
-                self.process_subscriber(subscriber)
-            except Exception as e:
-                self.stderr.write(
-                    f"Failed to process subscriber {subscriber.id}: {str(e)}"
+            if subscriber.id not in due_ids:
+                continue
+            # Still handling the previous command; it is picked up next loop
+            if self.dispatcher.is_busy(subscriber.id):
+                continue
+            self.dispatcher.submit(subscriber.id, self.poll_subscriber, subscriber)
+
+    def poll_subscriber(self, subscriber):
+        """Poll one subscriber and reschedule it based on whether anything changed."""
+        handled = 0
+        try:
+            handled = self.process_owned_subscriber(subscriber)
+        finally:
+            self.scheduler.record(subscriber.id, active=bool(handled))
+
+    def handle_subscriber_error(self, subscriber_id, error):
+        self.stderr.write(f"Failed to process subscriber {subscriber_id}: {str(error)}")
+
+    def run_sync_once(self):
+        """Long-poll /sync and dispatch subscribers whose rooms have new events."""
+        subscribers = self.get_owned_subscribers()
+
+        if not subscribers:
+            self.stdout.write("No active subscribers found")
+            time.sleep(5)
+            return
+
+        subscribers_by_room = {s.matrix_room_id: s for s in subscribers}
+
+        # /sync only signals events after the saved token, so read every
+        # subscriber's command cursor once when this replica takes it on
+        # (at startup or after a shard rebalance): commands left unhandled
+        # by a crash are picked up there instead of depending on the token
+        owned_ids = {s.id for s in subscribers}
+        self.caught_up &= owned_ids
+        for subscriber in subscribers:
+            if subscriber.id not in self.caught_up:
+                self.caught_up.add(subscriber.id)
+                self.dispatcher.submit(
+                    subscriber.id, self.process_owned_subscriber, subscriber
                 )
 
+        # Each replica filters to its own rooms, so each keeps its own position
+        sync_state_name = self.SYNC_STATE_NAME
+        if self.shard:
+            sync_state_name = f"{self.SYNC_STATE_NAME}:{self.shard.worker_id}"
+
+        sync_state, _ = MatrixSyncState.objects.get_or_create(name=sync_state_name)
+
+        sync_data = self.matrix_service.sync(
+            since=sync_state.next_batch or None,
+            timeout=self.sync_timeout,
+            sync_filter=self.build_sync_filter(list(subscribers_by_room)),
+        )
+
+        room_messages = self.matrix_service.get_sync_messages(sync_data)
+
+        for room_id in room_messages:
+            subscriber = subscribers_by_room.get(room_id)
+            if not subscriber:
+                continue
+
+            # The sync only signals new events; the command cursor reads
+            # them, so a limited (gapped) timeline loses nothing
+            self.dispatcher.submit(
+                subscriber.id, self.process_owned_subscriber, subscriber
+            )
+
+        # Persisted without waiting for the subscribers: the command cursor,
+        # not the sync token, records what has been handled
+        sync_state.next_batch = sync_data.get("next_batch", "")
+        sync_state.save(update_fields=["next_batch", "updated_at"])
+
+    def process_owned_subscriber(self, subscriber):
+        """Process a subscriber, guarded against other replicas in sharded mode."""
+        if not self.shard:
+            return self.process_subscriber(subscriber)
+
+        with self.shard.subscriber_lock(subscriber.id) as acquired:
+            if not acquired:
+                # Another replica is handling it during a rebalance
+                return 0
+            return self.process_subscriber(subscriber)
+
+    def build_sync_filter(self, room_ids):
+        """Limit /sync to message timelines of subscriber control rooms."""
+        return {
+            "presence": {"types": []},
+            "account_data": {"types": []},
+            "room": {
+                "rooms": room_ids,
+                "timeline": {"types": ["m.room.message"], "limit": 10},
+                "state": {"types": []},
+                "ephemeral": {"types": []},
+                "account_data": {"types": []},
+            },
+        }
+
     def process_subscriber(self, subscriber):
-        # Get last message from subscriber's matrix room
-        last_message = self.matrix_service.get_last_message(
-            room_id=subscriber.matrix_room_id
+        """
+        Handle every message posted since the subscriber's command cursor, in order.
+
+        Returns:
+            Number of new messages from the subscriber that were handled
+        """
+        cursor = self.get_command_cursor(subscriber)
+
+        if not cursor.pagination_token:
+            return self.start_command_cursor(subscriber, cursor)
+
+        handled = 0
+
+        while True:
+            page = self.matrix_service.fetch_room_events(
+                room_id=subscriber.matrix_room_id,
+                from_token=cursor.pagination_token,
+                direction="f",
+                limit=self.CURSOR_PAGE_SIZE,
+            )
+            messages = page["messages"]
+
+            # A previous run may have died mid-page; skip what it handled
+            event_ids = [m["event_id"] for m in messages]
+            if cursor.last_event_id in event_ids:
+                messages = messages[event_ids.index(cursor.last_event_id) + 1 :]
+
+            for message in messages:
+                if message.get("sender") != self.FRIDAY_USER_ID:
+                    self.handle_message(subscriber, message)
+                    handled += 1
+                self.advance_command_cursor(cursor, last_event_id=message["event_id"])
+
+            if not page["event_count"] or not page["end"]:
+                break
+
+            self.advance_command_cursor(cursor, pagination_token=page["end"])
+
+            if page["event_count"] < self.CURSOR_PAGE_SIZE:
+                break
+
+        return handled
+
+    def get_command_cursor(self, subscriber):
+        cursor, _ = SubscriberCommandCursor.objects.get_or_create(
+            subscriber=subscriber,
+            defaults={"room_id": subscriber.matrix_room_id},
         )
 
-        if not last_message:
-            return
+        # The control room changed; the old position means nothing there
+        if cursor.room_id != subscriber.matrix_room_id:
+            cursor.room_id = subscriber.matrix_room_id
+            cursor.last_event_id = ""
+            cursor.pagination_token = ""
+            cursor.save()
 
-        # If last message is from Friday, skip (already responded)
-        if last_message.get("sender") == self.FRIDAY_USER_ID:
-            return
+        return cursor
+
+    def start_command_cursor(self, subscriber, cursor):
+        """
+        Place a new cursor at the live end of the room.
+
+        Only the latest message is considered, so a backlog from before the
+        cursor existed is not replayed.
+        """
+        page = self.matrix_service.fetch_room_events(
+            room_id=subscriber.matrix_room_id,
+            direction="b",
+            limit=10,
+        )
+
+        # Backward pages are newest first
+        last_message = page["messages"][0] if page["messages"] else None
 
-        message_body = last_message.get("body", "").lower().strip()
+        handled = 0
+        if last_message and last_message.get("sender") != self.FRIDAY_USER_ID:
+            self.handle_message(subscriber, last_message)
+            handled = 1
+
+        self.advance_command_cursor(
+            cursor,
+            last_event_id=last_message["event_id"] if last_message else "",
+            pagination_token=page["start"] or "",
+        )
+        return handled
+
+    def advance_command_cursor(self, cursor, **fields):
+        """Persist new cursor fields in a single UPDATE."""
+        for name, value in fields.items():
+            setattr(cursor, name, value)
+        SubscriberCommandCursor.objects.filter(pk=cursor.pk).update(
+            updated_at=timezone.now(), **fields
+        )
+
+    def handle_message(self, subscriber, message):
+        """Parse a single message from the subscriber and route it."""
+        message_body = message.get("body", "").lower().strip()
 
         # Parse and route command
         command, args = self.parse_command(message_body)
@@ -200,7 +516,7 @@ class Command(BaseCommand):
         if not self.check_summary_cooldown(subscriber):
             return
 
-        self.process_summaries(subscriber, subscriber_rooms)
+        self.request_summaries(subscriber, list(subscriber_rooms))
 
     def handle_summary_room(self, subscriber, args):
         """Handle summary for a specific room."""
@@ -230,7 +546,7 @@ class Command(BaseCommand):
         if not self.check_summary_cooldown(subscriber):
             return
 
-        self.process_summaries(subscriber, [room])
+        self.request_summaries(subscriber, [room], room=room)
 
     def handle_todo_all(self, subscriber):
         """Show all pending todos for subscriber."""
@@ -321,61 +637,251 @@ class Command(BaseCommand):
                 return False
         return True
 
+    def request_summaries(self, subscriber, subscriber_rooms, room=None):
+        """Summarize inline, or queue a SummaryJob when --enqueue-summaries is set."""
+        if not self.job_queue:
+            failed_rooms = self.process_summaries(subscriber, subscriber_rooms)
+            if failed_rooms:
+                self.matrix_service.send_message(
+                    room_id=subscriber.matrix_room_id,
+                    body=f"Sorry, I couldn't summarize {len(failed_rooms)} room(s). Please try again later.",
+                )
+            return
+
+        kind = SummaryJob.KIND_ROOM if room else SummaryJob.KIND_ALL
+
+        if self.job_queue.has_unfinished(subscriber, kind, room=room):
+            self.matrix_service.send_message(
+                room_id=subscriber.matrix_room_id,
+                body="Your summary is already being prepared.",
+            )
+            return
+
+        self.job_queue.enqueue(subscriber, kind, room=room, rooms=subscriber_rooms)
+
+        # Replying also marks the command as handled for the next poll
+        self.matrix_service.send_message(
+            room_id=subscriber.matrix_room_id,
+            body="Preparing your summary...",
+        )
+
     def process_summaries(self, subscriber, subscriber_rooms):
+        """
+        Summarize rooms and send each result to the subscriber.
+
+        Returns:
+            List of rooms whose summary failed
+        """
         access_token = self.matrix_service.get_access_token()
         today = timezone.now().date()
-        summaries_sent = 0
+        rooms = list(subscriber_rooms)
 
-        for room in subscriber_rooms:
-            try:
-                # Get or create processing state
-                state, _ = ConversationProcessingState.objects.get_or_create(
-                    room=room,
-                    defaults={"status": ConversationProcessingState.STATUS_IDLE},
+        if not rooms:
+            # e.g. a queued job whose rooms were removed since
+            self.matrix_service.send_message(
+                room_id=subscriber.matrix_room_id,
+                body="Tidak ada pesan baru untuk diringkas.",
+            )
+            return []
+
+        prepared = [None] * len(rooms)
+        batch_results = {}
+
+        # LLM capacity is shared fairly between subscribers by plan weight
+        tenant = llm_tenant(f"subscriber:{subscriber.id}", subscriber.llm_weight)
+
+        # Each room is sent as soon as its own summary is ready
+        with tenant, ThreadPoolExecutor(
+            max_workers=min(self.room_concurrency, len(rooms)),
+            thread_name_prefix="room",
+        ) as executor:
+            if settings.LLM_CONFIG["BATCH"]["ENABLED"] and len(rooms) > 1:
+                # Small rooms share one LLM request; the rest, and any room
+                # the batch didn't answer, are summarized on their own
+                prepared = list(
+                    executor.map(
+                        lambda room: self.try_prepare_room(room, access_token),
+                        rooms,
+                    )
+                )
+                batch_results = self.llm_service.process_batch(
+                    {
+                        index: room_data["context"]
+                        for index, room_data in enumerate(prepared)
+                        if room_data and room_data.get("context")
+                    }
                 )
 
-                # Build context for summary
-                context = self.llm_service.build_llm_context_for_summary(
-                    state=state,
-                    room_service=self.room_service,
-                    access_token=access_token,
+            def summarize(index):
+                return self.summarize_room(
+                    subscriber,
+                    rooms[index],
+                    access_token,
+                    today,
+                    prepared=prepared[index],
+                    result=batch_results.get(index),
                 )
 
-                if not context:
-                    continue
+            results = list(executor.map(with_tenant(summarize), range(len(rooms))))
 
-                # Process with LLM
-                summary = self.llm_service.process_room(state=state, context=context)
+        summaries_sent = results.count(self.ROOM_SENT)
+        failed_rooms = [
+            room for room, result in zip(rooms, results) if result == self.ROOM_FAILED
+        ]
+
+        if summaries_sent == 0 and not failed_rooms:
+            self.matrix_service.send_message(
+                room_id=subscriber.matrix_room_id,
+                body="Tidak ada pesan baru untuk diringkas.",
+            )
+
+        return failed_rooms
+
+    def prepare_room(self, room, access_token) -> dict:
+        """
+        Claim a room and load its processing state, warm summary and LLM context.
+
+        If the background pass is summarizing the room, waits for it and
+        reuses its warm summary instead of summarizing the same messages.
 
-                # Increment daily count
-                question_count = self.get_and_increment_daily_count(room, today)
+        Raises:
+            RoomBusyError: The room stayed claimed by another run
+        """
+        # Get or create processing state
+        state, _ = ConversationProcessingState.objects.get_or_create(
+            room=room,
+            defaults={"status": ConversationProcessingState.STATUS_IDLE},
+        )
+        self.llm_service.claim_room_or_wait(state, timeout=self.CLAIM_WAIT_SECONDS)
+
+        try:
+            # Summary built in the background, if any; only the delta since
+            # it was built still needs the LLM
+            warm_summary = self.llm_service.get_warm_summary(room)
+
+            # Build context for summary
+            context = self.llm_service.build_llm_context_for_summary(
+                state=state,
+                room_service=self.room_service,
+                access_token=access_token,
+                base_summary=warm_summary,
+            )
+        except Exception as e:
+            state.status = ConversationProcessingState.STATUS_FAILED
+            state.failure_reason = str(e)
+            state.save(update_fields=["status", "failure_reason", "updated_at"])
+            raise
+
+        return {"state": state, "warm_summary": warm_summary, "context": context}
+
+    def try_prepare_room(self, room, access_token):
+        """
+        prepare_room for batching; on error the room is retried by
+        summarize_room, unless it is busy (it was already waited for).
+        """
+        try:
+            return self.prepare_room(room, access_token)
+        except RoomBusyError as e:
+            return {"error": e}
+        except Exception as e:
+            self.stderr.write(f"Failed to prepare room {room.id} for batching: {str(e)}")
+            return None
+        finally:
+            # Runs on a pool thread, which owns its own DB connection
+            connections.close_all()
+
+    def summarize_room(
+        self, subscriber, room, access_token, today, prepared=None, result=None
+    ) -> str:
+        """
+        Summarize one room and send it. Returns one of the ROOM_* outcomes.
+
+        Args:
+            prepared: Output of prepare_room, built here if not given
+            result: LLM result from a batched request, if the room had one
+        """
+        state = None
+        message = None
+        try:
+            if prepared is None:
+                prepared = self.prepare_room(room, access_token)
+            elif "error" in prepared:
+                raise prepared["error"]
+            # Claimed from here on
+            state = prepared["state"]
+            warm_summary = prepared["warm_summary"]
+            context = prepared["context"]
+
+            if context:
+                on_text = None
+                stream_config = settings.LLM_CONFIG["STREAM"]
+                if result is None and stream_config["ENABLED"]:
+                    # Show the summary while it is generated
+                    message = ProgressiveMessage(
+                        self.matrix_service,
+                        room_id=subscriber.matrix_room_id,
+                        body=self.llm_service.format_partial_summary(room, ""),
+                        min_interval=stream_config["EDIT_INTERVAL_SECONDS"],
+                    )
+
+                    def show_partial(text):
+                        message.update(self.llm_service.format_partial_summary(room, text))
+
+                    on_text = show_partial
 
-                # Format and send
-                formatted_message = self.llm_service.format_summary_message(
-                    summary, question_count
+                # Process with LLM
+                summary = self.llm_service.process_room(
+                    state=state,
+                    context=context,
+                    base_summary=warm_summary,
+                    result=result,
+                    on_text=on_text,
                 )
+            elif warm_summary:
+                self.llm_service.release_room(state)
+                summary = warm_summary
+            else:
+                self.llm_service.release_room(state)
+                return self.ROOM_EMPTY
+
+            # Increment daily count
+            question_count = self.get_and_increment_daily_count(room, today)
+
+            # Format and send
+            formatted_message = self.llm_service.format_summary_message(
+                summary, question_count
+            )
+            if message:
+                message.finish(formatted_message)
+            else:
                 self.matrix_service.send_message(
                     room_id=subscriber.matrix_room_id,
                     body=formatted_message,
                 )
 
-                # Mark as sent
-                summary.sent_at = timezone.now()
-                summary.save(update_fields=["sent_at"])
-
-                summaries_sent += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f"Sent summary for room {room.id}")
-                )
-
-            except Exception as e:
-                self.stderr.write(f"Failed to summarize room {room.id}: {str(e)}")
-
-        if summaries_sent == 0:
-            self.matrix_service.send_message(
-                room_id=subscriber.matrix_room_id,
-                body="Tidak ada pesan baru untuk diringkas.",
-            )
+            # Mark as sent
+            summary.sent_at = timezone.now()
+            summary.save(update_fields=["sent_at"])
+
+            self.stdout.write(self.style.SUCCESS(f"Sent summary for room {room.id}"))
+            return self.ROOM_SENT
+
+        except Exception as e:
+            self.stderr.write(f"Failed to summarize room {room.id}: {str(e)}")
+            if state:
+                state.status = ConversationProcessingState.STATUS_FAILED
+                state.failure_reason = str(e)
+                state.save(update_fields=["status", "failure_reason", "updated_at"])
+            if message:
+                try:
+                    message.finish(f"Failed to summarize {room.room_name or room.room_id}.")
+                except Exception:
+                    pass
+            return self.ROOM_FAILED
+
+        finally:
+            # Runs on a pool thread, which owns its own DB connection
+            connections.close_all()
 
     def get_and_increment_daily_count(self, room, today) -> int:
         """Get current count, increment it, and return the new count."""
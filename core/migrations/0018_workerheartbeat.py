@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-16 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_matrixsyncstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkerHeartbeat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("worker_id", models.CharField(max_length=255, unique=True)),
+                ("heartbeat_at", models.DateTimeField(db_index=True)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["worker_id"],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.27 on 2026-10-16 04:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_summaryjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriberCommandCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "room_id",
+                    models.CharField(
+                        help_text="Control room the cursor was taken in",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "last_event_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="Last message event that has been handled",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "pagination_token",
+                    models.CharField(
+                        blank=True,
+                        help_text="Matrix /messages token to continue reading forward from",
+                        max_length=255,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "subscriber",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="command_cursor",
+                        to="core.subscriber",
+                    ),
+                ),
+            ],
+        ),
+    ]
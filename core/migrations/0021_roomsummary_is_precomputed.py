@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-16 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_subscribercommandcursor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="roomsummary",
+            name="is_precomputed",
+            field=models.BooleanField(
+                default=False,
+                help_text="Built in the background ahead of a summary request",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-16 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_roomsummary_is_precomputed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="roomsummary",
+            name="estimated_prompt_tokens",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Locally estimated prompt size after packing",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="prompt_tokens",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Prompt size reported by the provider",
+                null=True,
+            ),
+        ),
+    ]
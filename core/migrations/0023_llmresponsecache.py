@@ -0,0 +1,39 @@
+# Generated by Django 4.2.27 on 2026-10-16 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_roomsummary_estimated_prompt_tokens_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMResponseCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("model", models.CharField(max_length=100)),
+                ("response", models.JSONField()),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("last_hit_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "LLM response cache entry",
+                "verbose_name_plural": "LLM response cache",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-16 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_llmresponsecache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generalsettings",
+            name="light_llm_model",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("gpt-5.1", "GPT 5.1"),
+                    ("gemini-3", "Gemini 3"),
+                    ("gpt-5-mini", "GPT 5 mini"),
+                    ("gemini-2.5-flash", "Gemini 2.5 Flash"),
+                ],
+                default="gpt-5-mini",
+                help_text="Cheaper model for small rooms that need no reply; empty disables routing",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="generalsettings",
+            name="llm_model",
+            field=models.CharField(
+                choices=[
+                    ("gpt-5.1", "GPT 5.1"),
+                    ("gemini-3", "Gemini 3"),
+                    ("gpt-5-mini", "GPT 5 mini"),
+                    ("gemini-2.5-flash", "Gemini 2.5 Flash"),
+                ],
+                default="gpt-5.1",
+                max_length=100,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="model",
+            field=models.CharField(
+                blank=True,
+                help_text="LLM model chosen by routing for this summary",
+                max_length=100,
+            ),
+        ),
+    ]
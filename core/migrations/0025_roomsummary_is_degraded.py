@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-16 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_generalsettings_light_llm_model_roomsummary_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="roomsummary",
+            name="is_degraded",
+            field=models.BooleanField(
+                default=False,
+                help_text="Built by the local extractive fallback instead of the LLM",
+            ),
+        ),
+    ]
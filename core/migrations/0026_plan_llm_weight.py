@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-16 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_roomsummary_is_degraded"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plan",
+            name="llm_weight",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Relative share of LLM capacity when subscribers compete for it",
+            ),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 4.2.27 on 2026-10-16 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_plan_llm_weight"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="model",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="prompt_tokens",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="completion_tokens",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="cost",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="LLM cost in USD by LLM_CONFIG PRICING",
+                max_digits=12,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="llm_latency_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="fetch_latency_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="roomchecklog",
+            name="total_latency_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="completion_tokens",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Completion size reported by the provider",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="cost",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="LLM cost in USD by LLM_CONFIG PRICING",
+                max_digits=12,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="llm_latency_ms",
+            field=models.PositiveIntegerField(
+                blank=True, help_text="Time spent on LLM requests", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="fetch_latency_ms",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Time spent fetching messages and building the context",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="roomsummary",
+            name="total_latency_ms",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Wall time from fetching messages to saving the summary",
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="RoomSummaryUsage",
+            fields=[],
+            options={
+                "verbose_name": "LLM usage",
+                "verbose_name_plural": "LLM usage",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("core.roomsummary",),
+        ),
+    ]
@@ -9,8 +9,14 @@ from core.models.event import (
     ConversationProcessingState,
     RoomDailySummaryCount,
     RoomSummary,
+    RoomSummaryUsage,
 )
 from core.models.todolist import TodoList
+from core.models.sync import MatrixSyncState
+from core.models.worker import WorkerHeartbeat
+from core.models.job import SummaryJob
+from core.models.cursor import SubscriberCommandCursor
+from core.models.llm_cache import LLMResponseCache
 
 __all__ = [
     "GeneralSettings",
@@ -25,5 +31,11 @@ __all__ = [
     "ConversationProcessingState",
     "RoomDailySummaryCount",
     "RoomSummary",
+    "RoomSummaryUsage",
     "TodoList",
+    "MatrixSyncState",
+    "WorkerHeartbeat",
+    "SummaryJob",
+    "SubscriberCommandCursor",
+    "LLMResponseCache",
 ]
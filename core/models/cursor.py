@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class SubscriberCommandCursor(models.Model):
+    """Position in a subscriber's control room up to which commands are handled."""
+
+    subscriber = models.OneToOneField(
+        "Subscriber",
+        on_delete=models.CASCADE,
+        related_name="command_cursor",
+    )
+    room_id = models.CharField(
+        max_length=255,
+        help_text="Control room the cursor was taken in",
+    )
+    last_event_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Last message event that has been handled",
+    )
+    pagination_token = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Matrix /messages token to continue reading forward from",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.subscriber} @ {self.last_event_id or '-'}"
@@ -68,6 +68,56 @@ class RoomSummary(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
     send_failed_at = models.DateTimeField(null=True, blank=True)
     send_error = models.TextField(blank=True)
+    is_precomputed = models.BooleanField(
+        default=False,
+        help_text="Built in the background ahead of a summary request",
+    )
+    estimated_prompt_tokens = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Locally estimated prompt size after packing",
+    )
+    prompt_tokens = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Prompt size reported by the provider",
+    )
+    model = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="LLM model chosen by routing for this summary",
+    )
+    is_degraded = models.BooleanField(
+        default=False,
+        help_text="Built by the local extractive fallback instead of the LLM",
+    )
+    completion_tokens = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Completion size reported by the provider",
+    )
+    cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        help_text="LLM cost in USD by LLM_CONFIG PRICING",
+    )
+    llm_latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Time spent on LLM requests",
+    )
+    fetch_latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Time spent fetching messages and building the context",
+    )
+    total_latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Wall time from fetching messages to saving the summary",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -76,3 +126,12 @@ class RoomSummary(models.Model):
 
     def __str__(self):
         return f"{self.room} - {self.created_at}"
+
+
+class RoomSummaryUsage(RoomSummary):
+    """RoomSummary aggregated per day, subscriber and room in the admin."""
+
+    class Meta:
+        proxy = True
+        verbose_name = "LLM usage"
+        verbose_name_plural = "LLM usage"
@@ -2,7 +2,19 @@ from django.db import models
 
 
 class GeneralSettings(models.Model):
-    MODEL_CHOICES = [("gpt-5.1", "GPT 5.1"), ("gemini-3", "Gemini 3")]
+    MODEL_CHOICES = [
+        ("gpt-5.1", "GPT 5.1"),
+        ("gemini-3", "Gemini 3"),
+        ("gpt-5-mini", "GPT 5 mini"),
+        ("gemini-2.5-flash", "Gemini 2.5 Flash"),
+    ]
     llm_model = models.CharField(
         max_length=100, choices=MODEL_CHOICES, default="gpt-5.1"
     )
+    light_llm_model = models.CharField(
+        max_length=100,
+        choices=MODEL_CHOICES,
+        default="gpt-5-mini",
+        blank=True,
+        help_text="Cheaper model for small rooms that need no reply; empty disables routing",
+    )
@@ -0,0 +1,70 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SummaryJob(models.Model):
+    """Queued summary request, claimed by executors with SELECT ... SKIP LOCKED."""
+
+    KIND_ROOM = "room"
+    KIND_ALL = "all"
+
+    KIND_CHOICES = [
+        (KIND_ROOM, "Room summary"),
+        (KIND_ALL, "Summary all"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subscriber = models.ForeignKey(
+        "Subscriber",
+        on_delete=models.CASCADE,
+        related_name="summary_jobs",
+    )
+    room = models.ForeignKey(
+        "SubscriberRoom",
+        on_delete=models.CASCADE,
+        related_name="summary_jobs",
+        null=True,
+        blank=True,
+        help_text="Target room for room jobs; empty for summary all",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+    )
+    priority = models.IntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Job is not claimable before this time (backoff)",
+    )
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        target = self.room or "all rooms"
+        return f"[{self.status}] {self.kind} for {self.subscriber} ({target})"
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class LLMResponseCache(models.Model):
+    """Structured LLM results keyed by a hash of the model and context sent."""
+
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    response = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "LLM response cache entry"
+        verbose_name_plural = "LLM response cache"
+
+    def __str__(self):
+        return f"{self.model} {self.key[:12]}"
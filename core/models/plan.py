@@ -13,6 +13,10 @@ class Plan(models.Model):
     # Feature limits
     number_of_rooms = models.PositiveIntegerField(default=3)
     daily_summary_quota_per_room = models.PositiveIntegerField(default=3)
+    llm_weight = models.PositiveIntegerField(
+        default=1,
+        help_text="Relative share of LLM capacity when subscribers compete for it",
+    )
     version = models.PositiveIntegerField(default=1)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
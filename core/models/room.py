@@ -30,6 +30,19 @@ class RoomCheckLog(models.Model):
     checked_at = models.DateTimeField(auto_now_add=True)
     summary = models.TextField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    model = models.CharField(max_length=100, blank=True)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        help_text="LLM cost in USD by LLM_CONFIG PRICING",
+    )
+    llm_latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    fetch_latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    total_latency_ms = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ["-checked_at"]
@@ -51,6 +51,14 @@ class Subscriber(models.Model):
             return None
         return f"@whatsapp_{self.phone_number}:matrix.tirta.me"
 
+    @property
+    def llm_weight(self):
+        """Share of LLM capacity from the active plan (1 without one)."""
+        subscription = (
+            self.subscription_set.filter(status="active").select_related("plan").first()
+        )
+        return subscription.plan.llm_weight if subscription else 1
+
 
 class SubscriberRoom(models.Model):
     """Rooms that a subscriber wants us to observe."""
@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class MatrixSyncState(models.Model):
+    """Persisted /sync position so long-polling resumes where it left off."""
+
+    name = models.CharField(max_length=100, unique=True)
+    next_batch = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_batch or '-'}"
@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class WorkerHeartbeat(models.Model):
+    """Live summarize_rooms replicas, used to partition subscribers between them."""
+
+    worker_id = models.CharField(max_length=255, unique=True)
+    heartbeat_at = models.DateTimeField(db_index=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["worker_id"]
+
+    def __str__(self):
+        return f"{self.worker_id} @ {self.heartbeat_at}"
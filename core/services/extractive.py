@@ -0,0 +1,167 @@
+import math
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+STOPWORDS = {
+    # English
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
+    "has", "have", "i", "in", "is", "it", "its", "me", "my", "of", "on",
+    "or", "so", "that", "the", "this", "to", "was", "we", "were", "will",
+    "with", "you", "your",
+    # Indonesian
+    "ada", "aja", "akan", "aku", "dan", "dari", "di", "dengan", "gak", "ini",
+    "itu", "jadi", "juga", "ke", "kita", "ko", "kok", "nya", "saya", "sih",
+    "tapi", "udah", "untuk", "yang", "ya",
+}
+
+DEADLINE_PATTERN = re.compile(
+    r"\b(before|deadline|due|tomorrow|tonight|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|next week|eod|"
+    r"besok|lusa|malam ini|minggu depan|sebelum|paling lambat|"
+    r"senin|selasa|rabu|kamis|jumat|sabtu)\b"
+    r"|\b\d{1,2}[:.]\d{2}\b|\b\d{1,2}[/-]\d{1,2}\b",
+    re.IGNORECASE,
+)
+
+IMPERATIVE_PATTERN = re.compile(
+    r"^(please|pls|plz|can you|could you|don't forget|remember to|make sure|"
+    r"need to|needs to|have to|must|let's|"
+    r"tolong|mohon|jangan lupa|pastikan|harus|perlu|bisa|coba|minta)\b",
+    re.IGNORECASE,
+)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class ExtractiveSummarizer:
+    """
+    Local, CPU-only fallback for when the LLM provider is unavailable.
+
+    Sentences are scored with TextRank over TF-IDF cosine similarity and
+    the best ones are returned in conversation order. Todos are picked out
+    heuristically from sentences with deadlines or imperative phrasing.
+    Output follows the LLM output_format so it can be saved the same way.
+    """
+
+    def __init__(
+        self,
+        max_sentences: int = 5,
+        max_todos: int = 5,
+        damping: float = 0.85,
+        iterations: int = 50,
+    ):
+        self.max_sentences = max_sentences
+        self.max_todos = max_todos
+        self.damping = damping
+        self.iterations = iterations
+
+    def summarize(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Summarize an LLM context without calling the LLM.
+
+        Args:
+            context: LLM context dict from build_context
+
+        Returns:
+            Dict with room, summary, reply, needs_more_information,
+            todo_updates, new_todos
+        """
+        sentences = self.split_sentences(context)
+
+        selected = []
+        if sentences:
+            scores = self.score(sentences)
+            count = min(self.max_sentences, max(1, math.ceil(len(sentences) / 5)))
+            best = sorted(np.argsort(-scores)[:count])
+            selected = [sentences[i] for i in best]
+
+        summary = "\n".join(
+            f"- {sentence['name']}: {sentence['text']}" for sentence in selected
+        )
+
+        return {
+            "room": context.get("room", {}),
+            "summary": summary or "No messages to summarize.",
+            "reply": None,
+            "needs_more_information": False,
+            "todo_updates": [],
+            "new_todos": self.extract_todos(sentences),
+        }
+
+    def split_sentences(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        sender_mapping = context.get("sender_mapping") or {}
+        sentences = []
+        for message in context.get("messages") or []:
+            sender = message.get("sender", "")
+            name = sender_mapping.get(sender, sender)
+            if name == "yourself":
+                name = "You"
+            for text in SENTENCE_SPLIT.split(message.get("content") or ""):
+                text = text.strip()
+                if len(WORD.findall(text)) >= 2:
+                    sentences.append({"name": name, "text": text})
+        return sentences
+
+    def score(self, sentences: List[Dict[str, str]]) -> np.ndarray:
+        """TextRank score of each sentence over TF-IDF cosine similarity."""
+        tokens = [
+            [
+                word
+                for word in WORD.findall(sentence["text"].lower())
+                if word not in STOPWORDS and not word.isdigit()
+            ]
+            for sentence in sentences
+        ]
+        vocabulary = {word: i for i, word in enumerate(sorted({w for t in tokens for w in t}))}
+        if not vocabulary:
+            return np.ones(len(sentences))
+
+        tf = np.zeros((len(sentences), len(vocabulary)))
+        for row, words in enumerate(tokens):
+            for word in words:
+                tf[row, vocabulary[word]] += 1
+
+        document_frequency = np.count_nonzero(tf, axis=0)
+        idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+        tfidf = tf * idf
+
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+        similarity = tfidf @ tfidf.T
+        np.fill_diagonal(similarity, 0)
+
+        # Column-stochastic transition matrix; isolated sentences link to all
+        totals = similarity.sum(axis=0, keepdims=True)
+        transition = np.divide(
+            similarity,
+            totals,
+            out=np.full_like(similarity, 1 / len(sentences)),
+            where=totals > 0,
+        )
+
+        ranks = np.full(len(sentences), 1 / len(sentences))
+        for _ in range(self.iterations):
+            updated = (1 - self.damping) / len(sentences) + self.damping * transition @ ranks
+            if np.abs(updated - ranks).sum() < 1e-6:
+                ranks = updated
+                break
+            ranks = updated
+
+        return ranks
+
+    def extract_todos(self, sentences: List[Dict[str, str]]) -> List[str]:
+        """Sentences that look like tasks: imperative phrasing or a deadline."""
+        todos = []
+        for sentence in sentences:
+            text = sentence["text"]
+            if IMPERATIVE_PATTERN.search(text) or (
+                DEADLINE_PATTERN.search(text) and not text.endswith("?")
+            ):
+                todo = f"{text} ({sentence['name']})"
+                if todo not in todos:
+                    todos.append(todo)
+        return todos[-self.max_todos:]
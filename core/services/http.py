@@ -0,0 +1,94 @@
+import threading
+from typing import Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class MatrixHTTPClient:
+    """
+    Pooled HTTP client for Matrix/Synapse requests.
+
+    One instance is shared by the whole process (see get_matrix_client), so
+    every service, command and API request reuses keep-alive connections
+    (a pool per host) instead of paying DNS, TCP and TLS setup per call.
+    Requests get default connect and read timeouts, and an Authorization
+    header when given an access token.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 5,
+        read_timeout: float = 60,
+        pool_size: int = 32,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        access_token: Optional[str] = None,
+        timeout=None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request over the shared pool.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            access_token: Matrix access token, sent as a Bearer Authorization
+            timeout: Read timeout in seconds, or a (connect, read) tuple,
+                instead of the default
+            **kwargs: Passed to requests (params, json, headers, ...)
+
+        Returns:
+            The response; status is not checked
+        """
+        if access_token:
+            kwargs["headers"] = {
+                "Authorization": f"Bearer {access_token}",
+                **(kwargs.get("headers") or {}),
+            }
+
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (self.timeout[0], timeout)
+
+        return self.session.request(method, url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+
+_client: Optional[MatrixHTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_matrix_client() -> MatrixHTTPClient:
+    """Return the process-wide Matrix HTTP client, configured by MATRIX_CONFIG."""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            config = settings.MATRIX_CONFIG
+            _client = MatrixHTTPClient(
+                connect_timeout=config.get("CONNECT_TIMEOUT", 5),
+                read_timeout=config.get("READ_TIMEOUT", 60),
+                pool_size=config.get("POOL_SIZE", 32),
+            )
+        return _client
@@ -1,77 +1,175 @@
 import json
+import re
 import requests
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Any, Optional
 
 from django.conf import settings
+from django.db import connections
+from django.db.models import Q
 from django.utils import timezone
 
-from core.models import GeneralSettings, TodoList
-from core.services.user import UserService
+from core.models import TodoList
+from core.services.extractive import ExtractiveSummarizer
+from core.services.llm_cache import LLMCacheService
+from core.services.llm_hedging import LLMHedger
+from core.services.llm_journal import LLMJournal
+from core.services.llm_limiter import with_tenant
+from core.services.llm_provider import (
+    estimate_cost,
+    get_default_model,
+    get_light_model,
+    get_provider,
+)
+from core.services.matrix_async import get_sync_matrix_client
+from core.services.structured import (
+    parse_json,
+    parse_structured,
+    schema_from_output_format,
+    validate,
+)
+from core.services.tokens import ContextPacker, estimate_context_tokens, estimate_tokens
+
+
+class RoomBusyError(Exception):
+    """Raised when another run keeps a room in processing for too long."""
 
 
 class LLMService:
     """Service for LLM-related operations."""
 
-    NANOGPT_URL = "https://nano-gpt.com/api/v1/chat/completions"
+    # A room left in processing longer than this is assumed abandoned
+    STALE_PROCESSING_MINUTES = 10
+
+    # Runs LLM calls that have a fallback deadline; shared by the process
+    fallback_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-deadline")
+
+    # Bump whenever SYSTEM_PROMPT or the way contexts are sent changes, so
+    # journaled calls can be compared per prompt version
+    PROMPT_VERSION = "1"
+
+    # Context keys that are the same on every call; sent in the system message
+    STATIC_CONTEXT_KEYS = ("goals", "response_rules", "output_format")
+
+    SYSTEM_PROMPT = """You are an assistant analyzing a conversation. The user message is a JSON context with the room, its messages, sender_mapping, previous_messages and pending_todos.
+
+IMPORTANT: When referring to senders in your response, you MUST use the names from sender_mapping.
+- If sender_mapping shows a user mapped to "yourself", that is the owner/actor - refer to them as "kamu" or "you"
+- Other senders are mapped to their displayname - use these names directly in your response
+- Never use generic terms like "Pengirim", "Sender", or raw user IDs
+
+Follow the goals and response_rules below and provide a response following the output_format below.
+Return ONLY valid JSON matching the output_format, no additional text."""
 
     def __init__(self):
         self.actor_id = settings.MATRIX_CONFIG["USERNAME"]
-        self.api_key = settings.OPENAI_CONFIG["API_KEY"]
+        self.cache = LLMCacheService()
+        self.hedger = LLMHedger()
+        self.journal = LLMJournal()
+        # Whether invalid structured output gets a repair call
+        self.repair_enabled = True
 
     def get_model(self):
-        settings = GeneralSettings.objects.all().first()
-        return settings.llm_model
+        return get_default_model()
 
-    def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def process(
+        self,
+        context: Dict[str, Any],
+        on_text: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
-        Process LLM context and get a response from NanoGPT.
+        Process LLM context and get a response from the model's provider.
 
         Args:
             context: LLMContextResponse dict with messages, sender_mapping, goals, etc.
+            on_text: If given, the completion is streamed and this is called
+                with the summary text received so far as it grows
+            model: Model to use (default: the one selected in GeneralSettings)
 
         Returns:
             Dict with room, summary, reply, needs_more_information, todo_list
         """
-        model = self.get_model()
+        model = model or self.get_model()
         room = context.get("room", {})
-        prompt = f"""You are an assistant analyzing a conversation. Here is the context:
-
-{json.dumps(context, indent=2)}
 
-IMPORTANT: When referring to senders in your response, you MUST use the names from sender_mapping.
-- If sender_mapping shows a user mapped to "yourself", that is the owner/actor - refer to them as "kamu" or "you"
-- Other senders are mapped to their displayname - use these names directly in your response
-- Never use generic terms like "Pengirim", "Sender", or raw user IDs
+        cache_key = self.cache.make_key(model, context, prompt=self.SYSTEM_PROMPT)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            cached["_usage"] = {
+                "model": model,
+                "cache_hit": True,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "llm_latency_ms": 0,
+                "cost": 0,
+            }
+            return cached
 
-Based on the context above, provide a response following the output_format specified in the context.
-Return ONLY valid JSON matching the output_format, no additional text."""
+        original_context = context
+        context, packing = self.pack_context(context, model)
+        prompt_messages = self.build_prompt_messages(context)
+        schema = schema_from_output_format(context.get("output_format") or {})
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        started = time.monotonic()
+        try:
+            if on_text:
+                content, usage = self.stream_completion(
+                    model, prompt_messages, on_text, schema
+                )
+            else:
+                content, usage, model = self.complete(model, prompt_messages, schema)
+        except Exception as e:
+            self.journal.record(
+                original_context,
+                model,
+                self.PROMPT_VERSION,
+                None,
+                time.monotonic() - started,
+                {},
+                parsed=False,
+                error=repr(e),
+            )
+            raise
+        latency = time.monotonic() - started
 
-        payload = {
+        usage_info = {
             "model": model,
-            "messages": [{"role": "user", "content": prompt}],
+            "estimated_prompt_tokens": sum(
+                estimate_tokens(m["content"]) for m in prompt_messages
+            ),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "dropped_messages": packing["dropped_messages"],
         }
 
-        response = requests.post(self.NANOGPT_URL, headers=headers, json=payload)
-        response.raise_for_status()
-
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
+        # Validated against output_format, with one cheap repair call if needed
+        result, repair_usage = parse_structured(
+            content, schema, model, repair=self.repair_enabled
+        )
+        usage_info.update(repair_usage)
+        usage_info["llm_latency_ms"] = round((time.monotonic() - started) * 1000)
+        usage_info["cost"] = self.estimate_cost(usage_info)
+
+        self.journal.record(
+            original_context,
+            model,
+            self.PROMPT_VERSION,
+            content,
+            latency,
+            usage_info,
+            parsed=result is not None and not repair_usage,
+        )
 
-        try:
-            start_idx = content.find("{")
-            end_idx = content.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                result = json.loads(content[start_idx:end_idx])
-                result["room"] = room
-                return result
-        except (json.JSONDecodeError, ValueError):
-            pass
+        if result is not None:
+            result["room"] = room
+            # Only parsed results are cached; raw-text fallbacks are retried
+            self.cache.set(cache_key, model, result)
+            result["_usage"] = usage_info
+            return result
 
         return {
             "room": room,
@@ -79,24 +177,490 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             "reply": None,
             "needs_more_information": False,
             "todo_list": [],
+            "_usage": usage_info,
         }
 
-    def _get_displayname(self, user_id: str, user_service: UserService) -> str:
+    def estimate_cost(self, usage: Dict[str, Any]) -> Optional[float]:
+        """USD cost of a call and its repair call, or None if the model has no price."""
+        cost = estimate_cost(
+            usage.get("model"), usage.get("prompt_tokens"), usage.get("completion_tokens")
+        )
+        if cost is not None and usage.get("repair_model"):
+            cost += estimate_cost(
+                usage["repair_model"],
+                usage.get("repair_prompt_tokens"),
+                usage.get("repair_completion_tokens"),
+            ) or 0
+        return cost
+
+    def complete(
+        self,
+        model: str,
+        prompt_messages: List[Dict[str, str]],
+        schema: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Request a non-streamed chat completion, hedged if enabled.
+
+        Returns:
+            Tuple of (content, usage dict, model that answered)
         """
-        Fetch displayname for a user from Matrix API.
+        return self.hedger.complete(
+            model,
+            prompt_messages,
+            json_schema=schema,
+            is_valid=lambda content: not validate(parse_json(content), schema),
+        )
 
-        Args:
-            user_id: The Matrix user ID
-            user_service: UserService instance
+    def stream_completion(
+        self,
+        model: str,
+        prompt_messages: List[Dict[str, str]],
+        on_text: Callable[[str], None],
+        schema: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Stream a chat completion, reporting the partial summary as it grows.
+
+        on_text is called after every delta that changes the summary;
+        throttling is left to the callback.
 
         Returns:
-            Displayname if available, else empty string
+            Tuple of (content, usage dict as reported by the provider)
+        """
+        parts = []
+        usage = {}
+        last_text = None
+
+        for delta, chunk_usage in get_provider(model).stream(
+            model, prompt_messages, json_schema=schema
+        ):
+            usage = chunk_usage or usage
+            if not delta:
+                continue
+            parts.append(delta)
+
+            text = self.extract_partial_summary("".join(parts))
+            if text and text != last_text:
+                last_text = text
+                on_text(text)
+
+        return "".join(parts), usage
+
+    @staticmethod
+    def extract_partial_summary(content: str) -> Optional[str]:
+        """
+        Decode the "summary" value of a JSON response that is still arriving.
+
+        Falls back to the raw content when the model is not answering in JSON.
         """
+        match = re.search(r'"summary"\s*:\s*"', content)
+        if not match:
+            return None if "{" in content else content.strip()
+
+        chars = []
+        i = match.end()
+        while i < len(content):
+            char = content[i]
+            if char == '"':
+                break
+            if char == "\\":
+                # Keep escape sequences whole; stop before an incomplete one
+                length = 6 if content[i + 1:i + 2] == "u" else 2
+                if i + length > len(content):
+                    break
+                chars.append(content[i:i + length])
+                i += length
+                continue
+            chars.append(char)
+            i += 1
+
         try:
-            user_info = user_service.get_user_info(user_id)
-            return user_info.get("displayname", "")
-        except Exception:
-            return ""
+            return json.loads('"' + "".join(chars) + '"')
+        except ValueError:
+            return None
+
+    def build_prompt_messages(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Split a context into a static system message and a variable user message.
+
+        The instructions plus goals, response_rules and output_format are
+        serialized deterministically into the system message, which comes
+        first and is byte-identical across calls, so provider-side prompt
+        prefix caching can reuse it. The per-room data follows as compact JSON.
+
+        Args:
+            context: LLM context dict
+
+        Returns:
+            Chat messages for the completion request
+        """
+        static = {key: context[key] for key in self.STATIC_CONTEXT_KEYS if key in context}
+        variable = {
+            key: value
+            for key, value in context.items()
+            if key not in self.STATIC_CONTEXT_KEYS
+        }
+
+        system_prompt = "\n\n".join(
+            [
+                self.SYSTEM_PROMPT,
+                json.dumps(static, sort_keys=True, ensure_ascii=False, separators=(",", ":")),
+            ]
+        )
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {
+                "role": "user",
+                "content": json.dumps(variable, ensure_ascii=False, separators=(",", ":")),
+            },
+        ]
+
+    def pack_context(self, context: Dict[str, Any], model: str):
+        """
+        Fit a context into the model's configured prompt token budget.
+
+        Returns:
+            Tuple of (packed context, packing info from ContextPacker)
+        """
+        budgets = settings.LLM_CONFIG["CONTEXT_BUDGETS"]
+        budget = budgets.get(model, budgets["default"])
+        return ContextPacker(budget=budget).pack(context)
+
+    def merge_usage(
+        self,
+        partials: List[Dict[str, Any]],
+        final: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Merge the _usage of a map step's parallel calls and its reduce call.
+
+        Tokens and cost are summed. llm_latency_ms is the slowest partial
+        plus the reduce call, since the partials run in parallel. Flags
+        (e.g. repaired, cache_hit) are true if any call set them, and
+        strings such as model come from the last call (the reduce step).
+        """
+        merged = {}
+        results = partials + ([final] if final is not None else [])
+        for result in results:
+            for key, value in (result.get("_usage") or {}).items():
+                if value is None:
+                    merged.setdefault(key, None)
+                elif isinstance(value, bool):
+                    merged[key] = bool(merged.get(key)) or value
+                elif isinstance(value, str):
+                    merged[key] = value
+                elif key != "llm_latency_ms":
+                    merged[key] = (merged.get(key) or 0) + value
+
+        latencies = [
+            (result.get("_usage") or {}).get("llm_latency_ms") for result in partials
+        ]
+        latency = max((value for value in latencies if value is not None), default=None)
+        if final is not None and (final.get("_usage") or {}).get("llm_latency_ms") is not None:
+            latency = (latency or 0) + final["_usage"]["llm_latency_ms"]
+        if latency is not None:
+            merged["llm_latency_ms"] = latency
+        return merged
+
+    def route_model(self, context: Dict[str, Any]) -> str:
+        """
+        Pick the model for a room context.
+
+        Contexts within the LLM_CONFIG ROUTING message and token limits that
+        don't look like they need a reply go to the light model from
+        GeneralSettings; everything else uses the main model.
+        """
+        model = self.get_model()
+        config = settings.LLM_CONFIG["ROUTING"]
+        if not config["ENABLED"]:
+            return model
+
+        light_model = get_light_model()
+        if not light_model:
+            return model
+
+        messages = context.get("messages") or []
+        if len(messages) > config["LIGHT_MAX_MESSAGES"]:
+            return model
+        if estimate_context_tokens(self._variable_context(context)) > config["LIGHT_MAX_TOKENS"]:
+            return model
+        if self.needs_reply(context, config["QUESTION_RATIO"]):
+            return model
+
+        return light_model
+
+    def needs_reply(self, context: Dict[str, Any], question_ratio: float) -> bool:
+        """Whether others are waiting on an answer from "yourself"."""
+        sender_mapping = context.get("sender_mapping") or {}
+        others = [
+            message
+            for message in context.get("messages") or []
+            if sender_mapping.get(message.get("sender")) != "yourself"
+        ]
+        if not others:
+            return False
+
+        questions = sum(1 for message in others if "?" in message.get("content", ""))
+        last = (context.get("messages") or [])[-1]
+        if last in others and "?" in last.get("content", ""):
+            return True
+        return questions / len(others) >= question_ratio
+
+    def process_batch(self, contexts: Dict[Any, Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Answer several small room contexts with shared multi-room requests.
+
+        Contexts that share the same instructions are packed, up to the
+        LLM_CONFIG BATCH limits, into one request whose output is keyed per
+        room. Rooms that are too large, end up alone in a batch, or are
+        missing from the response are left out of the returned dict so the
+        caller can fall back to single-room calls.
+
+        Args:
+            contexts: Mapping of caller key to LLM context from build_context
+
+        Returns:
+            Mapping of caller key to result, for the rooms answered by a batch
+        """
+        config = settings.LLM_CONFIG["BATCH"]
+        if not config["ENABLED"] or len(contexts) < 2:
+            return {}
+
+        # Group batchable contexts by their static instructions
+        groups: Dict[str, List] = {}
+        for key, context in contexts.items():
+            variable = self._variable_context(context)
+            tokens = estimate_context_tokens(variable)
+            if tokens > config["MAX_ROOM_TOKENS"]:
+                continue
+            static = {k: context.get(k) for k in self.STATIC_CONTEXT_KEYS}
+            group_key = json.dumps(static, sort_keys=True, default=str)
+            groups.setdefault(group_key, []).append((key, context, variable, tokens))
+
+        batches = []
+        for members in groups.values():
+            batch, batch_tokens = [], 0
+            for member in members:
+                if batch and (
+                    len(batch) >= config["MAX_ROOMS"]
+                    or batch_tokens + member[3] > config["MAX_BATCH_TOKENS"]
+                ):
+                    batches.append(batch)
+                    batch, batch_tokens = [], 0
+                batch.append(member)
+                batch_tokens += member[3]
+            batches.append(batch)
+
+        results = {}
+        for batch in batches:
+            if len(batch) < 2:
+                continue
+            try:
+                results.update(self._process_batch_request(batch))
+            except Exception:
+                # The rooms fall back to single-room calls
+                continue
+        return results
+
+    def _variable_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-room part of a context (no shared instructions or metadata)."""
+        return {
+            key: value
+            for key, value in context.items()
+            if key not in self.STATIC_CONTEXT_KEYS and not key.startswith("_")
+        }
+
+    def _process_batch_request(self, batch) -> Dict[Any, Dict[str, Any]]:
+        first_context = batch[0][1]
+        goals = dict(first_context.get("goals", {}))
+        goals["batch"] = {
+            "enabled": True,
+            "instructions": "rooms contains several independent conversations. "
+            "Analyze each room on its own, using only its own messages, "
+            "sender_mapping, previous_messages and pending_todos, and return "
+            "one result per room under its key.",
+        }
+
+        batch_context = {
+            "rooms": [
+                dict(variable, key=f"room_{index}")
+                for index, (_, _, variable, _) in enumerate(batch)
+            ],
+            "goals": goals,
+            "response_rules": first_context.get("response_rules", {}),
+            "output_format": {
+                "results": {"<room key>": first_context.get("output_format", {})},
+            },
+        }
+
+        # The batch can use the light model only if every room would
+        models = {self.route_model(context) for _, context, _, _ in batch}
+        model = models.pop() if len(models) == 1 else self.get_model()
+
+        response = self.process(context=batch_context, model=model)
+        room_results = response.get("results")
+        if not isinstance(room_results, dict):
+            return {}
+
+        # Attribute the request's tokens and cost to rooms by their share of
+        # the prompt; every room waited for the whole request
+        usage = response.get("_usage") or {}
+        total_tokens = sum(member[3] for member in batch) or 1
+
+        results = {}
+        for index, (key, context, _, tokens) in enumerate(batch):
+            result = room_results.get(f"room_{index}")
+            if not isinstance(result, dict) or "summary" not in result:
+                continue
+
+            share = tokens / total_tokens
+            result["room"] = context.get("room", {})
+            result["_usage"] = {
+                name: self.share_usage(name, value, share) for name, value in usage.items()
+            }
+            result["_usage"]["batched"] = True
+            results[key] = result
+
+        return results
+
+    def share_usage(self, name: str, value: Any, share: float) -> Any:
+        """A room's share of one usage value of a batched request."""
+        if name == "llm_latency_ms" or isinstance(value, bool):
+            return value
+        if isinstance(value, float):
+            return value * share
+        if isinstance(value, int):
+            return round(value * share)
+        return value
+
+    def process_chunked(
+        self,
+        context: Dict[str, Any],
+        on_text: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process LLM context, splitting a long backlog into map-reduce chunks.
+
+        Messages are split into token-bounded windows that are summarized in
+        parallel; the partial results are then reduced into a single result
+        with the same output_format as process().
+
+        Args:
+            context: LLM context dict from build_context
+            on_text: Streaming callback for the final (single or reduce) call,
+                see process()
+            model: Model for all calls (default: the one in GeneralSettings)
+
+        Returns:
+            Dict with room, summary, reply, needs_more_information,
+            todo_updates, new_todos
+        """
+        chunks = self.split_messages(
+            context.get("messages", []), settings.LLM_CONFIG["CHUNK_TOKENS"]
+        )
+        if len(chunks) <= 1:
+            return self.process(context=context, on_text=on_text, model=model)
+
+        map_contexts = []
+        for index, chunk in enumerate(chunks, 1):
+            map_context = dict(context, messages=chunk)
+            map_context["chunk"] = {
+                "part": index,
+                "total_parts": len(chunks),
+                "instructions": "These messages are one consecutive part of a longer "
+                "conversation. Summarize only this part.",
+            }
+            map_contexts.append(map_context)
+
+        with ThreadPoolExecutor(
+            max_workers=min(settings.LLM_CONFIG["CHUNK_CONCURRENCY"], len(chunks)),
+            thread_name_prefix="llm-chunk",
+        ) as executor:
+            partials = list(
+                executor.map(
+                    with_tenant(lambda c: self.process(context=c, model=model)),
+                    map_contexts,
+                )
+            )
+
+        result = self.process(
+            context=self.build_reduce_context(context, partials),
+            on_text=on_text,
+            model=model,
+        )
+        result["_usage"] = self.merge_usage(partials, result)
+
+        # Keep todo work from the chunks if the reduce step left it out
+        if "new_todos" not in result:
+            result["new_todos"] = list(
+                dict.fromkeys(t for p in partials for t in p.get("new_todos", []))
+            )
+        if "todo_updates" not in result:
+            updates = {}
+            for partial in partials:
+                for update in partial.get("todo_updates", []):
+                    updates[update.get("id")] = update
+            result["todo_updates"] = list(updates.values())
+
+        return result
+
+    def split_messages(
+        self, messages: List[Dict[str, str]], max_tokens: int
+    ) -> List[List[Dict[str, str]]]:
+        """Split messages into consecutive windows of at most max_tokens each."""
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        for message in messages:
+            tokens = estimate_tokens(message.get("content", "")) + 8
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(current)
+                current = []
+                current_tokens = 0
+            current.append(message)
+            current_tokens += tokens
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def build_reduce_context(
+        self, context: Dict[str, Any], partials: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build the context that combines chunk results into the final result."""
+        goals = dict(context.get("goals", {}))
+        goals["combine_partial_summaries"] = {
+            "enabled": True,
+            "instructions": "partial_summaries are consecutive parts of one "
+            "conversation, oldest first. Write one summary of the whole "
+            "conversation, base reply on the latest part, and merge and "
+            "deduplicate their todo_updates and new_todos.",
+        }
+
+        return {
+            "room": context.get("room", {}),
+            "partial_summaries": [
+                {
+                    "part": index,
+                    "summary": partial.get("summary"),
+                    "reply": partial.get("reply"),
+                    "needs_more_information": partial.get("needs_more_information"),
+                    "todo_updates": partial.get("todo_updates", []),
+                    "new_todos": partial.get("new_todos", []),
+                }
+                for index, partial in enumerate(partials, 1)
+            ],
+            "previous_messages": context.get("previous_messages"),
+            "pending_todos": context.get("pending_todos", []),
+            "sender_mapping": context.get("sender_mapping", {}),
+            "goals": goals,
+            "response_rules": context.get("response_rules", {}),
+            "output_format": context.get("output_format", {}),
+        }
 
     def build_context(
         self,
@@ -106,6 +670,7 @@ Return ONLY valid JSON matching the output_format, no additional text."""
         access_token: str,
         previous_messages: Dict[str, Any] = None,
         pending_todos: List[Dict[str, Any]] = None,
+        cumulative: bool = False,
     ) -> Dict[str, Any]:
         """
         Build LLM context from a list of messages.
@@ -117,18 +682,38 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             access_token: Matrix access token for fetching user info
             previous_messages: Dict with 'summary' and 'todo_list' from last LLM reply
             pending_todos: List of pending todo items with id, description, notes
+            cumulative: Ask for a summary that extends previous_messages.summary
+                instead of one covering only the new messages
 
         Returns:
             Complete LLM context dictionary
         """
-        user_service = UserService(access_token=access_token)
+        senders = [
+            sender
+            for sender in dict.fromkeys(msg.get("sender", "") for msg in messages)
+            if sender and sender != yourself
+        ]
+
+        # Looked up concurrently over the shared HTTP/2 connections
+        displaynames = {}
+        if senders:
+            try:
+                displaynames = get_sync_matrix_client().get_displaynames(
+                    senders, access_token
+                )
+            except Exception:
+                pass
+
         sender_mapping = {yourself: "yourself"}
+        for sender in senders:
+            sender_mapping[sender] = displaynames.get(sender) or sender
 
-        for msg in messages:
-            sender = msg.get("sender", "")
-            if sender and sender not in sender_mapping:
-                displayname = self._get_displayname(sender, user_service)
-                sender_mapping[sender] = displayname if displayname else sender
+        conversation_summary = {
+            "enabled": True,
+            "length": "short",
+        }
+        if cumulative:
+            conversation_summary["extend_previous_summary"] = True
 
         return {
             "room": room,
@@ -153,10 +738,7 @@ Return ONLY valid JSON matching the output_format, no additional text."""
                     "check_existing_todos": True,
                     "create_new_todos": True,
                 },
-                "conversation_summary": {
-                    "enabled": True,
-                    "length": "short",
-                },
+                "conversation_summary": conversation_summary,
             },
             "response_rules": {
                 "language": "same as sender",
@@ -180,8 +762,132 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             },
         }
 
-    def build_llm_context_for_summary(
+    def fetch_new_messages(
         self, state, room_service, access_token: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch messages posted since the room was last summarized.
+
+        Up to MAX_BACKLOG_MESSAGES, oldest first; a room never summarized
+        gets only its latest FIRST_SUMMARY_MAX_MESSAGES.
+
+        Args:
+            state: ConversationProcessingState for the room
+            room_service: RoomService instance for fetching messages
+            access_token: Matrix access token
+
+        Returns:
+            Messages in chronological order
+        """
+        room = state.room
+        if state.last_message_synced_at:
+            max_messages = settings.LLM_CONFIG["MAX_BACKLOG_MESSAGES"]
+        else:
+            max_messages = settings.LLM_CONFIG["FIRST_SUMMARY_MAX_MESSAGES"]
+
+        messages_data = room_service.get_messages(
+            room_id=room.room_id,
+            room_name=room.room_name or room.room_id,
+            access_token=access_token,
+            from_timestamp=state.last_message_synced_at,
+            paginate=True,
+            max_messages=max_messages,
+        )
+        return messages_data.get("messages", [])
+
+    def get_warm_summary(self, room):
+        """
+        Get the background summary waiting to be sent for a room.
+
+        Returns:
+            Latest unsent precomputed RoomSummary newer than the last sent
+            summary, or None
+        """
+        from core.models import RoomSummary
+
+        summaries = RoomSummary.objects.filter(
+            room=room,
+            is_precomputed=True,
+            sent_at__isnull=True,
+        )
+
+        last_sent = (
+            RoomSummary.objects.filter(room=room, sent_at__isnull=False)
+            .order_by("-created_at")
+            .first()
+        )
+        if last_sent:
+            summaries = summaries.filter(created_at__gt=last_sent.created_at)
+
+        return summaries.order_by("-created_at").first()
+
+    def claim_room(self, state) -> bool:
+        """
+        Atomically move a room into processing unless another run holds it.
+
+        Both the on-request summary and the background pass claim the room
+        before reading its state, so they never summarize the same messages
+        twice. A claim older than STALE_PROCESSING_MINUTES is taken over.
+
+        Returns:
+            True if claimed; the room must then end in process_room,
+            release_room or a failed state
+        """
+        from core.models import ConversationProcessingState
+
+        now = timezone.now()
+        stale_before = now - timedelta(minutes=self.STALE_PROCESSING_MINUTES)
+
+        claimed = (
+            ConversationProcessingState.objects.filter(pk=state.pk)
+            .filter(
+                ~Q(status=ConversationProcessingState.STATUS_PROCESSING)
+                | Q(processing_started_at__lt=stale_before)
+            )
+            .update(
+                status=ConversationProcessingState.STATUS_PROCESSING,
+                processing_started_at=now,
+                updated_at=now,
+            )
+        )
+
+        if claimed:
+            state.refresh_from_db()
+        return bool(claimed)
+
+    def claim_room_or_wait(self, state, timeout: float, interval: float = 1):
+        """
+        Claim a room, waiting up to timeout seconds for a run holding it.
+
+        The state is re-read once claimed, so a summary finished meanwhile
+        by the other run is picked up as warm summary instead of redone.
+
+        Raises:
+            RoomBusyError: The room is still held after timeout
+        """
+        deadline = time.monotonic() + timeout
+        while not self.claim_room(state):
+            if time.monotonic() >= deadline:
+                raise RoomBusyError(f"Room {state.room_id} is being summarized by another run")
+            time.sleep(interval)
+
+    def release_room(self, state):
+        """Return a claimed room to idle without summarizing it."""
+        from core.models import ConversationProcessingState
+
+        ConversationProcessingState.objects.filter(
+            pk=state.pk, status=ConversationProcessingState.STATUS_PROCESSING
+        ).update(status=ConversationProcessingState.STATUS_IDLE, updated_at=timezone.now())
+        state.status = ConversationProcessingState.STATUS_IDLE
+
+    def build_llm_context_for_summary(
+        self,
+        state,
+        room_service,
+        access_token: str,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        base_summary=None,
+        started_at: Optional[float] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Build LLM context for generating a room summary.
@@ -190,30 +896,29 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             state: ConversationProcessingState for the room
             room_service: RoomService instance for fetching messages
             access_token: Matrix access token
+            messages: Already fetched new messages (fetched if not provided)
+            base_summary: Unsent RoomSummary to extend with the new messages
+            started_at: time.time() when the caller started fetching
+                messages, if it fetched them
 
         Returns:
             LLM context dict or None if no messages to process
         """
         from core.models import RoomSummary
 
+        started_at = started_at or time.time()
         room = state.room
         from_timestamp = state.last_message_synced_at
 
         # Fetch messages from Matrix
-        messages_data = room_service.get_messages(
-            room_id=room.room_id,
-            room_name=room.room_name or room.room_id,
-            access_token=access_token,
-            from_timestamp=from_timestamp,
-        )
-
-        messages = messages_data.get("messages", [])
+        if messages is None:
+            messages = self.fetch_new_messages(state, room_service, access_token)
 
         if not messages:
             return None
 
         # Get last RoomSummary for previous_messages context
-        last_summary = RoomSummary.objects.filter(room=room).first()
+        last_summary = base_summary or RoomSummary.objects.filter(room=room).first()
         previous_messages = None
         if last_summary:
             previous_messages = {
@@ -249,6 +954,7 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             access_token=access_token,
             previous_messages=previous_messages,
             pending_todos=pending_todos,
+            cumulative=base_summary is not None,
         )
 
         # Add metadata for processing
@@ -256,17 +962,88 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             "message_count": len(messages),
             "from_timestamp": from_timestamp.isoformat() if from_timestamp else None,
             "to_timestamp": messages[-1].get("timestamp") if messages else None,
+            # For the summary's latency breakdown, see process_room
+            "started_at": started_at,
+            "fetch_latency_ms": round((time.time() - started_at) * 1000),
         }
 
         return context
 
-    def process_room(self, state, context: Dict[str, Any]):
+    def process_with_fallback(
+        self,
+        context: Dict[str, Any],
+        on_text: Optional[Callable[[str], None]] = None,
+        fallback: bool = True,
+    ):
+        """
+        Run process_chunked, falling back to the local extractive summarizer
+        if the provider fails or LLM_CONFIG FALLBACK DEADLINE_SECONDS passes.
+
+        Args:
+            context: LLM context dict from build_context
+            on_text: Streaming callback, see process()
+            fallback: Whether falling back is allowed
+
+        Returns:
+            Tuple of (result, whether it is a degraded local result)
+        """
+        model = self.route_model(context)
+        config = settings.LLM_CONFIG["FALLBACK"]
+        if not fallback or not config["ENABLED"]:
+            return self.process_chunked(context=context, on_text=on_text, model=model), False
+
+        def run():
+            try:
+                return self.process_chunked(context=context, on_text=on_text, model=model)
+            finally:
+                # Runs on a pool thread, which owns its own DB connection
+                connections.close_all()
+
+        future = self.fallback_executor.submit(with_tenant(run))
+        try:
+            return future.result(timeout=config["DEADLINE_SECONDS"]), False
+        except FuturesTimeoutError:
+            # The LLM call keeps running in the background; its result is dropped
+            reason = f"LLM deadline of {config['DEADLINE_SECONDS']}s exceeded"
+        except requests.RequestException as e:
+            if not self.is_provider_failure(e):
+                raise
+            reason = f"LLM provider failed: {str(e)}"
+
+        result = ExtractiveSummarizer().summarize(context)
+        result["_usage"] = {"model": "extractive", "fallback_reason": reason}
+        return result, True
+
+    def is_provider_failure(self, error: requests.RequestException) -> bool:
+        """Timeouts, connection errors, rate limits and 5xx responses."""
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+        response = getattr(error, "response", None)
+        return response is None or response.status_code == 429 or response.status_code >= 500
+
+    def process_room(
+        self,
+        state,
+        context: Dict[str, Any],
+        base_summary=None,
+        precomputed: bool = False,
+        result: Optional[Dict[str, Any]] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+    ):
         """
         Process room with LLM and save the summary.
 
         Args:
             state: ConversationProcessingState for the room
             context: LLM context dict from build_context_for_room
+            base_summary: Unsent RoomSummary the context extends; the new
+                summary then covers its messages too
+            precomputed: Whether this is a background summary built ahead
+                of a request
+            result: LLM result already obtained for this context (e.g. from
+                process_batch); the LLM is called if not provided
+            on_text: Called with the partial summary while the completion
+                streams; todos are only saved once it is complete
 
         Returns:
             The created RoomSummary
@@ -293,8 +1070,14 @@ Return ONLY valid JSON matching the output_format, no additional text."""
         if to_timestamp_str:
             to_timestamp = datetime.fromisoformat(to_timestamp_str)
 
-        # Process with LLM
-        result = self.process(context=context)
+        # Process with LLM, in chunks if the backlog is long; a requested
+        # summary falls back to a local one if the provider fails
+        degraded = False
+        if result is None:
+            result, degraded = self.process_with_fallback(
+                context, on_text=on_text, fallback=not precomputed
+            )
+        usage = result.pop("_usage", {})
 
         # Handle todo updates from LLM response
         todo_updates = result.get("todo_updates", [])
@@ -316,9 +1099,10 @@ Return ONLY valid JSON matching the output_format, no additional text."""
             except TodoList.DoesNotExist:
                 pass
 
-        # Create new todos from LLM response
+        # Create new todos from LLM response; heuristic todos of a degraded
+        # summary are only shown, since the LLM redoes these messages later
         new_todos = result.get("new_todos", [])
-        for description in new_todos:
+        for description in [] if degraded else new_todos:
             if description and isinstance(description, str):
                 TodoList.objects.create(
                     room=room,
@@ -326,18 +1110,49 @@ Return ONLY valid JSON matching the output_format, no additional text."""
                     status=TodoList.STATUS_PENDING,
                 )
 
+        summary_text = result.get("summary", "")
+        todo_list = new_todos
+        if base_summary:
+            message_count += base_summary.message_count
+            from_timestamp = base_summary.from_timestamp
+            todo_list = list(base_summary.todo_list) + new_todos
+            if degraded:
+                # The extractive summary only covers the new messages
+                summary_text = f"{base_summary.summary}\n\n{summary_text}"
+
         # Save RoomSummary (without old todo_list field, use new_todos for reference)
         summary = RoomSummary.objects.create(
             room=room,
-            summary=result.get("summary", ""),
+            summary=summary_text,
             reply=result.get("reply"),
             needs_more_information=result.get("needs_more_information", False),
-            todo_list=new_todos,
+            todo_list=todo_list,
             message_count=message_count,
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
+            is_precomputed=precomputed,
+            estimated_prompt_tokens=usage.get("estimated_prompt_tokens"),
+            prompt_tokens=usage.get("prompt_tokens"),
+            model=usage.get("model") or "",
+            is_degraded=degraded,
+            completion_tokens=usage.get("completion_tokens"),
+            cost=usage.get("cost"),
+            llm_latency_ms=usage.get("llm_latency_ms"),
+            fetch_latency_ms=metadata.get("fetch_latency_ms"),
+            total_latency_ms=(
+                round((time.time() - metadata["started_at"]) * 1000)
+                if metadata.get("started_at")
+                else None
+            ),
         )
 
+        if degraded:
+            # Leave the messages unsummarized so the LLM covers them next time
+            state.status = ConversationProcessingState.STATUS_IDLE
+            state.failure_reason = usage.get("fallback_reason", "")
+            state.save(update_fields=["status", "failure_reason", "updated_at"])
+            return summary
+
         # Update ConversationProcessingState
         state.status = ConversationProcessingState.STATUS_IDLE
         state.last_message_synced_at = to_timestamp
@@ -357,6 +1172,19 @@ Return ONLY valid JSON matching the output_format, no additional text."""
 
         return summary
 
+    def format_partial_summary(self, room, text: str) -> str:
+        """Format summary text that is still being generated."""
+        return "\n".join(
+            [
+                f"Room: {room.room_name or room.room_id}",
+                f"Platform: {room.platform}",
+                "",
+                "--- Summary ---",
+                "",
+                f"{text} …" if text else "Summarizing…",
+            ]
+        )
+
     def format_summary_message(self, summary, question_count: int = 0) -> str:
         """
         Format summary as human-readable multiline text.
@@ -372,12 +1200,26 @@ Return ONLY valid JSON matching the output_format, no additional text."""
         lines = [
             f"Room: {room.room_name or room.room_id}",
             f"Platform: {room.platform}",
-            "",
-            "--- Summary ---",
-            "",
-            summary.summary,
         ]
 
+        if summary.is_degraded:
+            lines.extend(
+                [
+                    "",
+                    "[Quick summary: the AI service is unavailable right now, "
+                    "so the key messages were picked out automatically]",
+                ]
+            )
+
+        lines.extend(
+            [
+                "",
+                "--- Summary ---",
+                "",
+                summary.summary,
+            ]
+        )
+
         if summary.reply:
             lines.extend(
                 [
@@ -0,0 +1,111 @@
+import copy
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import LLMResponseCache
+
+
+class LLMCacheService:
+    """
+    Content-addressed cache of structured LLM results.
+
+    Entries are keyed on a canonical hash of everything that determines the
+    response (prompt, model and context), expire after TTL_SECONDS and are
+    evicted least-recently-used once there are more than MAX_ENTRIES.
+    Hit and miss counters are kept per process.
+    """
+
+    _lock = threading.Lock()
+    _counters = {"hits": 0, "misses": 0}
+
+    def __init__(self):
+        config = settings.LLM_CONFIG["CACHE"]
+        self.enabled = config["ENABLED"]
+        self.ttl = timedelta(seconds=config["TTL_SECONDS"])
+        self.max_entries = config["MAX_ENTRIES"]
+
+    def make_key(self, model: str, context: Dict[str, Any], prompt: str = "") -> str:
+        """Canonical SHA-256 of the prompt, model and context."""
+        canonical = json.dumps(
+            {"prompt": prompt, "model": model, "context": context},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = timezone.now()
+        entry = LLMResponseCache.objects.filter(key=key, expires_at__gt=now).first()
+
+        if not entry:
+            self._count("misses")
+            return None
+
+        LLMResponseCache.objects.filter(pk=entry.pk).update(
+            hit_count=F("hit_count") + 1, last_hit_at=now
+        )
+        self._count("hits")
+        return copy.deepcopy(entry.response)
+
+    def set(self, key: str, model: str, result: Dict[str, Any]):
+        """Store a result and evict expired and least recently used entries."""
+        if not self.enabled:
+            return
+
+        now = timezone.now()
+        LLMResponseCache.objects.update_or_create(
+            key=key,
+            defaults={
+                "model": model,
+                "response": result,
+                "expires_at": now + self.ttl,
+            },
+        )
+        self.evict(now)
+
+    def evict(self, now=None):
+        now = now or timezone.now()
+        LLMResponseCache.objects.filter(expires_at__lte=now).delete()
+
+        excess = LLMResponseCache.objects.count() - self.max_entries
+        if excess > 0:
+            stale_ids = list(
+                LLMResponseCache.objects.annotate(
+                    last_used=Coalesce("last_hit_at", "created_at")
+                )
+                .order_by("last_used")
+                .values_list("id", flat=True)[:excess]
+            )
+            LLMResponseCache.objects.filter(id__in=stale_ids).delete()
+
+    @classmethod
+    def _count(cls, name: str):
+        with cls._lock:
+            cls._counters[name] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Hit/miss counters for this process and the current entry count."""
+        with cls._lock:
+            counters = dict(cls._counters)
+
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+            "entries": LLMResponseCache.objects.count(),
+        }
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.services.llm_limiter import with_tenant
+from core.services.llm_provider import CancelToken, get_provider
+
+
+class LLMHedger:
+    """
+    Hedged chat completions for tail latency.
+
+    The request goes to the primary model first. If it has not answered
+    within that model's recent PERCENTILE latency, the same request is sent
+    to SECONDARY_MODEL (on whatever provider serves it). The first valid
+    response wins and the other request is cancelled: its connection is
+    dropped as soon as its response has started, which also frees its
+    provider concurrency slot. Latency samples include failed and cancelled
+    requests, so a slow model does not look fast by only counting the calls
+    that finished; samples and counters are kept per process.
+    """
+
+    _lock = threading.Lock()
+    _latencies: Dict[str, deque] = {}
+    _counters = {"requests": 0, "hedged": 0, "errors": 0, "wins": {}}
+    _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+    def __init__(self):
+        config = settings.LLM_CONFIG["HEDGING"]
+        self.enabled = config["ENABLED"]
+        self.secondary_model = config["SECONDARY_MODEL"]
+        self.percentile = config["PERCENTILE"]
+        self.window = config["WINDOW"]
+        self.min_samples = config["MIN_SAMPLES"]
+        self.default_delay = config["DEFAULT_DELAY_SECONDS"]
+        self.min_delay = config["MIN_DELAY_SECONDS"]
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+        is_valid: Optional[Callable[[str], bool]] = None,
+        **params,
+    ) -> Tuple[str, Dict[str, Any], str]:
+        """
+        Request a chat completion, hedged if enabled.
+
+        Args:
+            model: Primary model
+            messages: Chat messages
+            json_schema: Expected response schema, see LLMProvider.complete
+            is_valid: Check applied to response content; an invalid
+                response only wins if the other request fails too
+
+        Returns:
+            Tuple of (content, usage, model that answered)
+        """
+        if not self.enabled or not self.secondary_model or self.secondary_model == model:
+            content, usage = self._attempt(model, messages, json_schema, None, params)
+            return content, usage, model
+
+        self._count("requests")
+        cancels = {model: CancelToken()}
+        futures = {
+            self._executor.submit(
+                with_tenant(self._attempt),
+                model,
+                messages,
+                json_schema,
+                cancels[model],
+                params,
+            ): model
+        }
+
+        done, _ = wait(futures, timeout=self.get_delay(model))
+        if not done:
+            self._count("hedged")
+            cancels[self.secondary_model] = CancelToken()
+            futures[
+                self._executor.submit(
+                    with_tenant(self._attempt),
+                    self.secondary_model,
+                    messages,
+                    json_schema,
+                    cancels[self.secondary_model],
+                    params,
+                )
+            ] = self.secondary_model
+
+        fallback = None
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                answered_by = futures[future]
+                try:
+                    content, usage = future.result()
+                except Exception as e:
+                    self._count("errors")
+                    error = e
+                    continue
+
+                if is_valid is None or is_valid(content):
+                    for other, cancel in cancels.items():
+                        if other != answered_by:
+                            cancel.set()
+                    self._count_win(answered_by)
+                    return content, usage, answered_by
+                fallback = fallback or (content, usage, answered_by)
+
+        if fallback:
+            self._count_win(fallback[2])
+            return fallback
+        raise error
+
+    def get_delay(self, model: str) -> float:
+        """Seconds to wait for model before hedging."""
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+
+        if len(samples) < self.min_samples:
+            return self.default_delay
+
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+
+    def _attempt(self, model, messages, json_schema, cancel, params):
+        started = time.monotonic()
+        try:
+            return get_provider(model).complete(
+                model, messages, json_schema=json_schema, cancel=cancel, **params
+            )
+        finally:
+            # A failed or cancelled call took at least this long
+            self._record_latency(model, time.monotonic() - started)
+
+    def _record_latency(self, model: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    @classmethod
+    def _count(cls, name: str):
+        with cls._lock:
+            cls._counters[name] += 1
+
+    @classmethod
+    def _count_win(cls, model: str):
+        name = f"{get_provider(model).name}:{model}"
+        with cls._lock:
+            cls._counters["wins"][name] = cls._counters["wins"].get(name, 0) + 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Hedging counters and the current hedge delay per model."""
+        hedger = cls()
+        with cls._lock:
+            counters = dict(cls._counters, wins=dict(cls._counters["wins"]))
+            models = list(cls._latencies)
+
+        return {
+            "enabled": hedger.enabled,
+            **counters,
+            "hedge_rate": (
+                round(counters["hedged"] / counters["requests"], 4)
+                if counters["requests"]
+                else None
+            ),
+            "delay_seconds": {model: round(hedger.get_delay(model), 2) for model in models},
+        }
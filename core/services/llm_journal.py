@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class LLMJournal:
+    """
+    Opt-in journal of LLM calls, for replaying real traffic offline.
+
+    Every call is appended as one JSON line to a gzip file per day and
+    process under DIRECTORY. Each line is written as its own gzip member,
+    so files stay readable while being written and after a crash.
+    Journals contain full conversation contexts; keep DIRECTORY private.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self):
+        config = settings.LLM_CONFIG["JOURNAL"]
+        self.enabled = config["ENABLED"]
+        self.directory = Path(config["DIRECTORY"])
+
+    def path(self) -> Path:
+        return self.directory / f"llm-{timezone.now():%Y%m%d}-{os.getpid()}.jsonl.gz"
+
+    def record(
+        self,
+        context: Dict[str, Any],
+        model: str,
+        prompt_version: str,
+        response: Optional[str],
+        latency_seconds: float,
+        usage: Dict[str, Any],
+        parsed: bool,
+        error: Optional[str] = None,
+    ):
+        """
+        Append one LLM call to the journal, if enabled.
+
+        Args:
+            context: Context as passed to LLMService.process (before packing)
+            model: Model that answered
+            prompt_version: LLMService.PROMPT_VERSION at the time of the call
+            response: Raw completion content, or None if the call failed
+            latency_seconds: Wall time of the completion request
+            usage: _usage of the result
+            parsed: Whether the content parsed and validated without repair
+            error: Exception description if the call failed
+        """
+        if not self.enabled:
+            return
+
+        self.write(
+            {
+                "timestamp": timezone.now().isoformat(),
+                "model": model,
+                "prompt_version": prompt_version,
+                "latency_ms": round(latency_seconds * 1000),
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+                "estimated_prompt_tokens": usage.get("estimated_prompt_tokens"),
+                "parsed": parsed,
+                "error": error,
+                "context": context,
+                "response": response,
+            }
+        )
+
+    def write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+        # A journal must never break summarization
+        try:
+            with self._lock:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with gzip.open(self.path(), "ab") as f:
+                    f.write(line.encode("utf-8") + b"\n")
+        except OSError:
+            pass
+
+
+def read_journal(paths: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of journal files, or of all journal files in directories.
+
+    A record cut short by a crash ends its file instead of raising.
+    """
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.glob("*.jsonl.gz")) if path.is_dir() else [path]
+        for file in files:
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+                except (EOFError, ValueError):
+                    continue
@@ -0,0 +1,224 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from django.utils import timezone
+
+# (key, weight) of whoever the current LLM work is for; see llm_tenant()
+current_tenant: contextvars.ContextVar[Optional[Tuple[str, float]]] = contextvars.ContextVar(
+    "llm_tenant", default=None
+)
+
+
+@contextmanager
+def llm_tenant(key: str, weight: float = 1):
+    """
+    Attribute LLM requests made in this context to a tenant (e.g. a
+    subscriber) for fair queueing. Work handed to thread pools must be
+    wrapped with with_tenant() to keep the tenant.
+    """
+    token = current_tenant.set((str(key), max(float(weight), 0.01)))
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+def with_tenant(fn: Callable) -> Callable:
+    """Wrap fn to run with the calling thread's tenant, e.g. on a thread pool."""
+    tenant = current_tenant.get()
+
+    def run(*args, **kwargs):
+        token = current_tenant.set(tenant)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            current_tenant.reset(token)
+
+    return run
+
+
+class LLMQueueTimeout(requests.Timeout):
+    """Raised when a request waited too long for a concurrency slot."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for requests to one LLM provider.
+
+    Every request that finishes within slow_seconds raises the limit by
+    1/limit (about +1 per round of requests); a 429 or 5xx halves it, at
+    most once per round, and a Retry-After pauses new requests until it
+    passes. Requests over the limit wait in line instead of failing, up to
+    queue_timeout seconds.
+
+    Waiting requests are served by weighted fair queueing across tenants
+    (see llm_tenant): each request gets a virtual finish tag 1/weight after
+    its tenant's previous one, and the lowest tag goes first. A tenant with
+    a long backlog therefore delays a newly arriving tenant by about one
+    request per active tenant, not by its whole backlog.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        backoff: float = 0.5,
+        slow_seconds: float = 60,
+        queue_timeout: float = 300,
+        default_retry_after: float = 5,
+        max_retries: int = 3,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.slow_seconds = slow_seconds
+        self.queue_timeout = queue_timeout
+        self.default_retry_after = default_retry_after
+        self.max_retries = max_retries
+
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        # Heap of (finish tag, sequence, tenant key) of waiting requests
+        self.waiting = []
+        self.virtual_time = 0.0
+        self.last_tags: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self.decreased_at = 0.0
+        self.counters = {"requests": 0, "throttled": 0, "overloaded": 0, "queue_timeouts": 0}
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Wait for a slot.
+
+        Returns:
+            Monotonic start time, to be passed to release()
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        key, weight = current_tenant.get() or ("", 1.0)
+
+        with self._condition:
+            tag = max(self.virtual_time, self.last_tags.get(key, 0.0)) + 1 / weight
+            self.last_tags[key] = tag
+            ticket = (tag, next(self._sequence), key)
+            heapq.heappush(self.waiting, ticket)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if (
+                        self.waiting[0] is ticket
+                        and now >= self.blocked_until
+                        and self.in_flight < int(self.limit)
+                    ):
+                        break
+                    if now >= deadline:
+                        self.counters["queue_timeouts"] += 1
+                        raise LLMQueueTimeout(
+                            f"No LLM slot within {self.queue_timeout}s "
+                            f"(limit {int(self.limit)}, {len(self.waiting)} queued)"
+                        )
+
+                    timeout = deadline - now
+                    if now < self.blocked_until:
+                        timeout = min(timeout, self.blocked_until - now)
+                    self._condition.wait(timeout=timeout)
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                # The next request in line may be able to go too
+                self._condition.notify_all()
+
+            self.virtual_time = max(self.virtual_time, tag)
+            self._forget_idle_tenants()
+            self.in_flight += 1
+            self.counters["requests"] += 1
+            return time.monotonic()
+
+    def _forget_idle_tenants(self):
+        """Drop tags that can no longer affect ordering."""
+        if len(self.last_tags) > 1000:
+            self.last_tags = {
+                key: tag for key, tag in self.last_tags.items() if tag > self.virtual_time
+            }
+
+    def release(
+        self,
+        started: float,
+        overloaded: bool = False,
+        throttled: bool = False,
+        retry_after: Optional[float] = None,
+        cancelled: bool = False,
+    ):
+        """
+        Free a slot and adapt the limit to how the request went.
+
+        Args:
+            started: Value returned by acquire()
+            overloaded: The provider answered 5xx or the connection failed
+            throttled: The provider answered 429
+            retry_after: Seconds the provider asked us to wait
+            cancelled: The request was abandoned before it finished; the
+                limit is left as is
+        """
+        now = time.monotonic()
+
+        with self._condition:
+            self.in_flight -= 1
+
+            if throttled or overloaded:
+                self.counters["throttled" if throttled else "overloaded"] += 1
+                # One decrease per round: ignore requests started before the last one
+                if started > self.decreased_at:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self.decreased_at = now
+
+                if throttled and retry_after is None:
+                    retry_after = self.default_retry_after
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+            elif not cancelled and now - started <= self.slow_seconds:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            queued_by_tenant = {}
+            for _, _, key in self.waiting:
+                queued_by_tenant[key or "-"] = queued_by_tenant.get(key or "-", 0) + 1
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queued": len(self.waiting),
+                "queued_by_tenant": queued_by_tenant,
+                "blocked_for_seconds": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+                **self.counters,
+            }
+
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - timezone.now()).total_seconds())
@@ -0,0 +1,338 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core.models import GeneralSettings
+from core.services.llm_limiter import AdaptiveLimiter, parse_retry_after
+
+
+class LLMRequestCancelled(Exception):
+    """Raised when a completion is abandoned, e.g. by the losing hedge."""
+
+
+class CancelToken:
+    """
+    Flag that abandons a completion once set, e.g. by the losing hedge.
+
+    Callbacks registered with on_set run on the thread that sets it, so a
+    request can be torn down right away instead of when its own thread
+    next checks the flag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._set = False
+        self._callbacks: List[Callable[[], Any]] = []
+
+    def is_set(self) -> bool:
+        return self._set
+
+    def set(self):
+        with self._lock:
+            if self._set:
+                return
+            self._set = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_set(self, callback: Callable[[], Any]):
+        """Call callback when the token is set, or now if it already is."""
+        with self._lock:
+            if not self._set:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+class LLMProvider:
+    """
+    Chat completion client for one OpenAI-compatible provider.
+
+    One instance per provider is shared by the whole process (see
+    get_provider), so its pooled keep-alive connections are reused by every
+    service, command and API request instead of being set up per call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str,
+        connect_timeout: float = 5,
+        read_timeout: float = 120,
+        pool_size: int = 16,
+        response_format: Optional[str] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        self.name = name
+        # "json_schema", "json_object" or None, whichever the provider supports
+        self.response_format = response_format
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiter = limiter or AdaptiveLimiter()
+
+    def request(
+        self,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        cancel: Optional[CancelToken] = None,
+    ):
+        """
+        POST a completion request through the concurrency limiter.
+
+        429 and 5xx responses shrink the limit, honour Retry-After and are
+        retried up to the limiter's max_retries before raising HTTPError.
+
+        A request cancelled while waiting for its response headers keeps its
+        concurrency slot until they arrive, since the connection stays busy
+        until then; it is then closed without being retried.
+
+        Returns:
+            Tuple of (successful response, limiter start time); the caller
+            must pass the start time to limiter.release() when done
+        """
+        for attempt in range(self.limiter.max_retries + 1):
+            started = self.limiter.acquire()
+            if cancel is not None and cancel.is_set():
+                self.limiter.release(started, cancelled=True)
+                raise LLMRequestCancelled(f"{self.name} request cancelled")
+
+            try:
+                response = self.session.post(
+                    self.url, json=payload, timeout=self.timeout, stream=stream
+                )
+            except (requests.Timeout, requests.ConnectionError):
+                self.limiter.release(started, overloaded=True)
+                raise
+            except Exception:
+                self.limiter.release(started)
+                raise
+
+            if cancel is not None and cancel.is_set():
+                response.close()
+                self.limiter.release(started, cancelled=True)
+                raise LLMRequestCancelled(f"{self.name} request cancelled")
+
+            throttled = response.status_code == 429
+            if not throttled and response.status_code < 500:
+                if not response.ok:
+                    self.limiter.release(started)
+                    response.raise_for_status()
+                return response, started
+
+            self.limiter.release(
+                started,
+                throttled=throttled,
+                overloaded=not throttled,
+                retry_after=parse_retry_after(response),
+            )
+            if attempt == self.limiter.max_retries:
+                response.raise_for_status()
+            response.close()
+
+    def build_payload(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+        **params,
+    ) -> Dict[str, Any]:
+        payload = {"model": model, "messages": messages, **params}
+        if json_schema is not None and self.response_format == "json_schema":
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema},
+            }
+        elif json_schema is not None and self.response_format == "json_object":
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+        cancel: Optional[CancelToken] = None,
+        **params,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Request a chat completion.
+
+        Args:
+            model: Model name
+            messages: Chat messages
+            json_schema: Expected response schema; enforced with the
+                provider's response_format where supported
+            cancel: Token that abandons the request once set; the body is
+                then read incrementally and the connection dropped as soon
+                as the response headers have arrived
+            **params: Extra request fields (e.g. max_tokens)
+
+        Returns:
+            Tuple of (content, usage dict as reported by the provider)
+        """
+        payload = self.build_payload(model, messages, json_schema, **params)
+
+        response, started = self.request(payload, stream=cancel is not None, cancel=cancel)
+        try:
+            if cancel is None:
+                data = response.json()
+            else:
+                # Closing the response from the cancelling thread aborts a
+                # read that is waiting for the next chunk
+                cancel.on_set(response.close)
+                body = bytearray()
+                try:
+                    with response:
+                        for chunk in response.iter_content(chunk_size=8192):
+                            if cancel.is_set():
+                                break
+                            body.extend(chunk)
+                except Exception:
+                    if not cancel.is_set():
+                        raise
+                if cancel.is_set():
+                    raise LLMRequestCancelled(f"{self.name} request cancelled")
+                data = json.loads(body)
+        finally:
+            # The only release of this slot once request() has returned
+            self.limiter.release(started, cancelled=cancel is not None and cancel.is_set())
+
+        return data["choices"][0]["message"]["content"], data.get("usage") or {}
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        json_schema: Optional[Dict[str, Any]] = None,
+        **params,
+    ) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Request a chat completion as a server-sent event stream.
+
+        Yields:
+            Tuples of (content delta, usage); usage is only set on the chunk
+            that reports it, normally the last one
+        """
+        payload = self.build_payload(
+            model,
+            messages,
+            json_schema,
+            stream=True,
+            stream_options={"include_usage": True},
+            **params,
+        )
+
+        response, started = self.request(payload, stream=True)
+        try:
+            response.encoding = "utf-8"
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                delta = "".join(
+                    (choice.get("delta") or {}).get("content") or ""
+                    for choice in chunk.get("choices") or []
+                )
+                yield delta, chunk.get("usage")
+        finally:
+            response.close()
+            self.limiter.release(started)
+
+
+_providers: Dict[str, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(model: Optional[str] = None) -> LLMProvider:
+    """
+    Return the process-wide provider serving a model.
+
+    Models are mapped to providers by LLM_CONFIG MODEL_PROVIDERS, falling
+    back to DEFAULT_PROVIDER; providers are configured in LLM_PROVIDERS.
+    """
+    config = settings.LLM_CONFIG
+    name = config["MODEL_PROVIDERS"].get(model, config["DEFAULT_PROVIDER"])
+
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            provider_config = settings.LLM_PROVIDERS[name]
+            limiter_config = {
+                key.lower(): value
+                for key, value in dict(
+                    config["LIMITER"], **provider_config.get("LIMITER", {})
+                ).items()
+            }
+            provider = LLMProvider(
+                name=name,
+                base_url=provider_config["BASE_URL"],
+                api_key=provider_config["API_KEY"],
+                connect_timeout=provider_config.get("CONNECT_TIMEOUT", 5),
+                read_timeout=provider_config.get("READ_TIMEOUT", 120),
+                pool_size=provider_config.get("POOL_SIZE", 16),
+                response_format=provider_config.get("RESPONSE_FORMAT"),
+                limiter=AdaptiveLimiter(**limiter_config),
+            )
+            _providers[name] = provider
+        return provider
+
+
+def provider_stats() -> Dict[str, Any]:
+    """Concurrency limiter state of every provider used by this process."""
+    with _providers_lock:
+        providers = list(_providers.values())
+    return {provider.name: provider.limiter.stats() for provider in providers}
+
+
+def get_default_model() -> str:
+    """The model selected in GeneralSettings."""
+    general_settings = GeneralSettings.objects.all().first()
+    if general_settings:
+        return general_settings.llm_model
+    return GeneralSettings._meta.get_field("llm_model").default
+
+
+def get_light_model() -> Optional[str]:
+    """The cheaper model selected in GeneralSettings, or None if routing is off."""
+    general_settings = GeneralSettings.objects.all().first()
+    if general_settings:
+        return general_settings.light_llm_model or None
+    return GeneralSettings._meta.get_field("light_llm_model").default or None
+
+
+def estimate_cost(
+    model: Optional[str],
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+) -> Optional[float]:
+    """USD cost of a completion by LLM_CONFIG PRICING, or None if the model has no price."""
+    price = settings.LLM_CONFIG["PRICING"].get(model)
+    if not price:
+        return None
+    return (
+        (prompt_tokens or 0) * price.get("PROMPT", 0)
+        + (completion_tokens or 0) * price.get("COMPLETION", 0)
+    ) / 1_000_000
@@ -1,5 +1,7 @@
 import json
 import requests
+import threading
+import time
 import urllib.parse
 import uuid
 from typing import Optional, List, Dict, Any, Tuple
@@ -7,7 +9,6 @@ from datetime import datetime
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from openai import OpenAI
 
 from core.models import (
     Room,
@@ -17,6 +18,9 @@ from core.models import (
     SubscriberRoom,
     Subscription,
 )
+from core.services.http import get_matrix_client
+from core.services.llm_provider import estimate_cost, get_default_model, get_provider
+from core.services.structured import parse_structured, schema_from_output_format
 
 
 class MatrixService:
@@ -27,6 +31,7 @@ class MatrixService:
         self.username = settings.MATRIX_CONFIG['USERNAME']
         self.password = settings.MATRIX_CONFIG['PASSWORD']
         self._access_token: Optional[str] = None
+        self.http = get_matrix_client()
 
     def login(self, username: Optional[str] = None, password: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -50,7 +55,7 @@ class MatrixService:
             "password": password or self.password,
         }
 
-        response = requests.post(url, json=payload)
+        response = self.http.post(url, json=payload)
         response.raise_for_status()
 
         data = response.json()
@@ -89,9 +94,7 @@ class MatrixService:
             if next_batch:
                 params["from"] = next_batch
 
-            headers = {"Authorization": f"Bearer {token}"}
-
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, access_token=token, params=params)
             response.raise_for_status()
 
             data = response.json()
@@ -121,9 +124,8 @@ class MatrixService:
         """
         token = access_token or self.get_access_token()
         url = f"{self.homeserver}/_synapse/admin/v1/rooms/{room_id}"
-        headers = {"Authorization": f"Bearer {token}"}
 
-        response = requests.get(url, headers=headers)
+        response = self.http.get(url, access_token=token)
         response.raise_for_status()
 
         return response.json()
@@ -156,14 +158,13 @@ class MatrixService:
         encoded_room_id = urllib.parse.quote(room_id)
 
         url = f"{self.homeserver}/_matrix/client/v3/rooms/{encoded_room_id}/messages"
-        headers = {"Authorization": f"Bearer {token}"}
 
         params = {
             "dir": "b",  # backward from the most recent
             "limit": limit,
         }
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self.http.get(url, access_token=token, params=params)
         response.raise_for_status()
 
         data = response.json()
@@ -172,31 +173,149 @@ class MatrixService:
         # Filter to only message events (m.room.message)
         messages = []
         for event in events:
-            if event.get('type') != 'm.room.message':
+            message = self.parse_message_event(event)
+            if not message:
                 continue
 
-            # Get timestamp from event
-            origin_ts = event.get('origin_server_ts', 0)
-            event_time = datetime.fromtimestamp(origin_ts / 1000, tz=timezone.utc)
-
             # Filter by from_timestamp if provided
-            if from_timestamp and event_time <= from_timestamp:
+            if from_timestamp and datetime.fromisoformat(message['timestamp']) <= from_timestamp:
                 continue
 
-            content = event.get('content', {})
-            messages.append({
-                'sender': event.get('sender', ''),
-                'body': content.get('body', ''),
-                'msgtype': content.get('msgtype', ''),
-                'timestamp': event_time.isoformat(),
-                'event_id': event.get('event_id', ''),
-            })
+            messages.append(message)
 
         # Reverse to chronological order (oldest first)
         messages.reverse()
 
         return messages
 
+    def fetch_room_events(
+        self,
+        room_id: str,
+        from_token: Optional[str] = None,
+        direction: str = "f",
+        limit: int = 50,
+        access_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of room messages relative to a pagination token.
+
+        Args:
+            room_id: The Matrix room ID
+            from_token: Token to paginate from (None for the live end of the room)
+            direction: "f" for forward (chronological) or "b" for backward
+            limit: Maximum number of events in the page
+            access_token: Matrix access token (uses cached if not provided)
+
+        Returns:
+            Dict with messages (in the page's order), start and end tokens,
+            and event_count (raw events in the page, including non-messages)
+        """
+        token = access_token or self.get_access_token()
+        encoded_room_id = urllib.parse.quote(room_id)
+
+        url = f"{self.homeserver}/_matrix/client/v3/rooms/{encoded_room_id}/messages"
+
+        params = {"dir": direction, "limit": limit}
+        if from_token:
+            params["from"] = from_token
+
+        response = self.http.get(url, access_token=token, params=params)
+        response.raise_for_status()
+
+        data = response.json()
+        events = data.get('chunk', [])
+
+        return {
+            'messages': [m for m in map(self.parse_message_event, events) if m],
+            'start': data.get('start'),
+            'end': data.get('end'),
+            'event_count': len(events),
+        }
+
+    @staticmethod
+    def parse_message_event(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Convert a raw m.room.message event into a message dict.
+
+        Args:
+            event: Raw Matrix event from /messages or /sync
+
+        Returns:
+            Dict with sender, body, msgtype, timestamp, event_id or None
+            if the event is not a room message
+        """
+        if event.get('type') != 'm.room.message':
+            return None
+
+        origin_ts = event.get('origin_server_ts', 0)
+        event_time = datetime.fromtimestamp(origin_ts / 1000, tz=timezone.utc)
+        content = event.get('content', {})
+
+        return {
+            'sender': event.get('sender', ''),
+            'body': content.get('body', ''),
+            'msgtype': content.get('msgtype', ''),
+            'timestamp': event_time.isoformat(),
+            'event_id': event.get('event_id', ''),
+        }
+
+    def sync(
+        self,
+        since: Optional[str] = None,
+        timeout: int = 30000,
+        sync_filter: Optional[Dict[str, Any]] = None,
+        access_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Long-poll the Matrix /sync endpoint for new events.
+
+        Args:
+            since: next_batch token from a previous sync (None for initial sync)
+            timeout: Long-poll timeout in milliseconds
+            sync_filter: Inline filter definition to limit returned events
+            access_token: Matrix access token (uses cached if not provided)
+
+        Returns:
+            Raw /sync response with next_batch and rooms
+        """
+        token = access_token or self.get_access_token()
+        url = f"{self.homeserver}/_matrix/client/v3/sync"
+
+        params = {"timeout": timeout}
+        if since:
+            params["since"] = since
+        if sync_filter:
+            params["filter"] = json.dumps(sync_filter)
+
+        # Give the HTTP read a margin on top of the server-side long-poll
+        response = self.http.get(
+            url, access_token=token, params=params, timeout=timeout / 1000 + 30
+        )
+        response.raise_for_status()
+
+        return response.json()
+
+    def get_sync_messages(self, sync_data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract new room messages from a /sync response.
+
+        Args:
+            sync_data: Raw /sync response
+
+        Returns:
+            Dict mapping room_id to its new messages in chronological order
+        """
+        joined_rooms = sync_data.get('rooms', {}).get('join', {})
+
+        room_messages = {}
+        for room_id, room_data in joined_rooms.items():
+            events = room_data.get('timeline', {}).get('events', [])
+            messages = [m for m in map(self.parse_message_event, events) if m]
+            if messages:
+                room_messages[room_id] = messages
+
+        return room_messages
+
     def send_message(
         self,
         room_id: str,
@@ -221,14 +340,59 @@ class MatrixService:
         txn_id = str(uuid.uuid4())
 
         url = f"{self.homeserver}/_matrix/client/v3/rooms/{encoded_room_id}/send/m.room.message/{txn_id}"
-        headers = {"Authorization": f"Bearer {token}"}
 
         payload = {
             "msgtype": msgtype,
             "body": body,
         }
 
-        response = requests.put(url, headers=headers, json=payload)
+        response = self.http.put(url, access_token=token, json=payload)
+        response.raise_for_status()
+
+        return response.json()
+
+    def edit_message(
+        self,
+        room_id: str,
+        event_id: str,
+        body: str,
+        msgtype: str = "m.text",
+        access_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Replace the content of a previously sent message (m.replace edit).
+
+        Args:
+            room_id: The Matrix room ID
+            event_id: Event ID of the message to edit
+            body: The new message body
+            msgtype: Message type (default: m.text)
+            access_token: Matrix access token (uses cached if not provided)
+
+        Returns:
+            Response with event_id of the edit event
+        """
+        token = access_token or self.get_access_token()
+        encoded_room_id = urllib.parse.quote(room_id)
+        txn_id = str(uuid.uuid4())
+
+        url = f"{self.homeserver}/_matrix/client/v3/rooms/{encoded_room_id}/send/m.room.message/{txn_id}"
+
+        payload = {
+            "msgtype": msgtype,
+            # Fallback shown by clients that don't support edits
+            "body": f"* {body}",
+            "m.new_content": {
+                "msgtype": msgtype,
+                "body": body,
+            },
+            "m.relates_to": {
+                "rel_type": "m.replace",
+                "event_id": event_id,
+            },
+        }
+
+        response = self.http.put(url, access_token=token, json=payload)
         response.raise_for_status()
 
         return response.json()
@@ -278,15 +442,133 @@ class MatrixService:
             ).exclude(matrix_room_id="")
         )
 
+class ProgressiveMessage:
+    """
+    A Matrix message that is posted once and then edited in place as its
+    content grows, e.g. while an LLM completion streams.
+
+    Intermediate updates are throttled to one edit per min_interval seconds
+    and are best effort; finish() always writes the final body, and updates
+    arriving after it (e.g. from an abandoned stream) are ignored.
+    """
+
+    def __init__(
+        self,
+        matrix_service: MatrixService,
+        room_id: str,
+        body: str,
+        min_interval: float = 1.5,
+        access_token: Optional[str] = None,
+    ):
+        self.matrix_service = matrix_service
+        self.room_id = room_id
+        self.min_interval = min_interval
+        self.access_token = access_token
+
+        response = matrix_service.send_message(
+            room_id=room_id, body=body, access_token=access_token
+        )
+        self.event_id = response["event_id"]
+        self.body = body
+        self.edited_at = time.monotonic()
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def update(self, body: str):
+        """Edit the message unless it was edited less than min_interval ago."""
+        with self._lock:
+            if (
+                self.finished
+                or body == self.body
+                or time.monotonic() - self.edited_at < self.min_interval
+            ):
+                return
+            try:
+                self._edit(body)
+            except requests.RequestException:
+                # A missed intermediate edit is superseded by the next one
+                pass
+
+    def finish(self, body: str):
+        """Write the final body."""
+        with self._lock:
+            self.finished = True
+            if body != self.body:
+                self._edit(body)
+
+    def _edit(self, body: str):
+        self.matrix_service.edit_message(
+            room_id=self.room_id,
+            event_id=self.event_id,
+            body=body,
+            access_token=self.access_token,
+        )
+        self.body = body
+        self.edited_at = time.monotonic()
+
+
 class RoomService:
     """Service for room management and AI-powered summaries."""
 
-    def __init__(self):
-        self.openai_client = OpenAI(
-            api_key=settings.OPENAI_CONFIG["API_KEY"],
-            base_url=settings.OPENAI_CONFIG["BASE_URL"],
+    ROOMS_OUTPUT_FORMAT = {
+        "summary": "string",
+        "todo_list": [
+            {
+                "room_id": "string",
+                "room_name": "string",
+                "action": "string",
+                "priority": "high | medium | low",
+            }
+        ],
+    }
+
+    CONVERSATION_OUTPUT_FORMAT = {
+        "summary": "string",
+        "action_items": [
+            {
+                "description": "string",
+                "assignee": "string | null",
+                "due_date": "string | null",
+                "priority": "high | medium | low",
+            }
+        ],
+    }
+
+    def complete_json(
+        self, prompt: str, max_tokens: int, output_format: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], str, Dict[str, Any]]:
+        """
+        Run a single-prompt completion on the model selected in GeneralSettings
+        and parse it as structured output.
+
+        Returns:
+            Tuple of (result matching output_format or None, raw content,
+            usage with model, tokens, llm_latency_ms and cost)
+        """
+        model = get_default_model()
+        schema = schema_from_output_format(output_format)
+        started = time.monotonic()
+        content, usage = get_provider(model).complete(
+            model,
+            [{"role": "user", "content": prompt}],
+            json_schema=schema,
+            max_tokens=max_tokens,
         )
-        self.model = "gpt-4o-mini"
+        result, repair_usage = parse_structured(content, schema, model)
+
+        prompt_tokens = (usage.get("prompt_tokens") or 0) + (
+            repair_usage.get("repair_prompt_tokens") or 0
+        )
+        completion_tokens = (usage.get("completion_tokens") or 0) + (
+            repair_usage.get("repair_completion_tokens") or 0
+        )
+        return result, content, {
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "llm_latency_ms": round((time.monotonic() - started) * 1000),
+            "cost": estimate_cost(model, prompt_tokens, completion_tokens),
+        }
 
     def sync_rooms(self, rooms_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -345,47 +627,65 @@ class RoomService:
         access_token: str,
         limit: int = 100,
         from_timestamp: Optional[datetime] = None,
+        paginate: bool = False,
+        max_messages: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Fetch messages from a Matrix room using Synapse Admin API.
         Filters messages after from_timestamp if provided.
+
+        With paginate, keeps paging backward (limit events per page) until
+        from_timestamp or the start of the room is reached, so no message
+        in between is dropped. max_messages caps the total: after
+        from_timestamp the oldest are kept, so a caller that advances to the
+        last returned message picks up the rest next time; without
+        from_timestamp (nothing summarized yet) the newest are kept.
         """
         homeserver = settings.MATRIX_CONFIG["HOMESERVER"]
         encoded_room_id = urllib.parse.quote(room_id)
-        headers = {"Authorization": f"Bearer {access_token}"}
+        http = get_matrix_client()
 
         url = f"{homeserver}/_synapse/admin/v1/rooms/{encoded_room_id}/messages"
-        params = {"limit": limit, "dir": "b"}
+        from_token = None
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
+        messages = []
+        while True:
+            params = {"limit": limit, "dir": "b"}
+            if from_token:
+                params["from"] = from_token
 
-        data = response.json()
-        chunk = data.get("chunk", [])
+            response = http.get(url, access_token=access_token, params=params)
+            response.raise_for_status()
 
-        messages = []
-        for event in chunk:
-            if event.get("type") != "m.room.message":
-                continue
+            data = response.json()
+            chunk = data.get("chunk", [])
 
-            origin_ts = event.get("origin_server_ts", 0)
-            event_time = datetime.fromtimestamp(origin_ts / 1000, tz=timezone.utc)
+            reached_from_timestamp = False
+            for event in chunk:
+                message = MatrixService.parse_message_event(event)
+                if not message:
+                    continue
 
-            # Filter by from_timestamp if provided
-            if from_timestamp and event_time <= from_timestamp:
-                continue
+                # Filter by from_timestamp if provided
+                if from_timestamp and datetime.fromisoformat(message["timestamp"]) <= from_timestamp:
+                    reached_from_timestamp = True
+                    continue
 
-            content = event.get("content", {})
+                messages.append(message)
 
-            messages.append({
-                "sender": event.get("sender", ""),
-                "body": content.get("body", ""),
-                "msgtype": content.get("msgtype", ""),
-                "timestamp": event_time.isoformat(),
-                "event_id": event.get("event_id", ""),
-            })
+            from_token = data.get("end")
+            if not paginate or reached_from_timestamp or not chunk or not from_token:
+                break
+            if max_messages and not from_timestamp and len(messages) >= max_messages:
+                break
 
+        # Pages are newest first
         messages.reverse()
+        if max_messages and from_timestamp:
+            messages = messages[:max_messages]
+        elif max_messages:
+            messages = messages[-max_messages:]
+
         return {
             "room": {"id": room_id, "name": room_name},
             "messages": messages,
@@ -444,23 +744,11 @@ Respond in JSON format with the following structure:
 
 Focus on identifying rooms that might need immediate attention (many members, old unchecked, etc.)."""
 
-        response = self.openai_client.chat.completions.create(
-            model=self.model,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}],
+        result, response_text, _ = self.complete_json(
+            prompt, max_tokens=1024, output_format=self.ROOMS_OUTPUT_FORMAT
         )
-
-        response_text = response.choices[0].message.content
-
-        try:
-            start_idx = response_text.find("{")
-            end_idx = response_text.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                result = json.loads(json_str)
-                return result
-        except (json.JSONDecodeError, ValueError):
-            pass
+        if result is not None:
+            return result
 
         return {
             "summary": response_text,
@@ -520,25 +808,14 @@ Focus on:
 - Deadlines mentioned
 - Unresolved issues"""
 
-        response = self.openai_client.chat.completions.create(
-            model=self.model,
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}],
+        result, response_text, usage = self.complete_json(
+            prompt, max_tokens=2048, output_format=self.CONVERSATION_OUTPUT_FORMAT
         )
+        if result is None:
+            result = {"summary": response_text, "action_items": []}
 
-        response_text = response.choices[0].message.content
-
-        try:
-            start_idx = response_text.find("{")
-            end_idx = response_text.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                result = json.loads(json_str)
-                return result
-        except (json.JSONDecodeError, ValueError):
-            pass
-
-        return {"summary": response_text, "action_items": []}
+        result["_usage"] = usage
+        return result
 
     def summarize_room_conversation(
         self, matrix_room_id: str, matrix_service: MatrixService
@@ -551,11 +828,14 @@ Focus on:
 
         from_timestamp = room.last_checked_at
 
+        started = time.monotonic()
         messages = matrix_service.fetch_room_messages(
             room_id=matrix_room_id, from_timestamp=from_timestamp
         )
+        fetch_latency_ms = round((time.monotonic() - started) * 1000)
 
         summary_data = self.generate_conversation_summary(room, messages)
+        usage = summary_data.pop("_usage", {})
 
         now = timezone.now()
         room.is_checked = True
@@ -566,6 +846,13 @@ Focus on:
             room=room,
             summary=summary_data.get("summary", ""),
             notes=json.dumps(summary_data.get("action_items", [])),
+            model=usage.get("model") or "",
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            cost=usage.get("cost"),
+            llm_latency_ms=usage.get("llm_latency_ms"),
+            fetch_latency_ms=fetch_latency_ms,
+            total_latency_ms=round((time.monotonic() - started) * 1000),
         )
 
         return {
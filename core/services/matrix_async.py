@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import urllib.parse
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+from django.conf import settings
+
+
+class AsyncMatrixClient:
+    """
+    asyncio client for Synapse lookups that fan out to many requests at once,
+    such as the displaynames of every sender in a room.
+
+    Requests share one httpx connection pool that negotiates HTTP/2, so
+    concurrent requests to Synapse are multiplexed over a few connections
+    instead of needing a connection (and a thread) each. Everything else
+    goes through the sync services and core.services.http.
+
+    An instance belongs to the event loop it is first used on; sync code
+    uses the process-wide one through get_sync_matrix_client().
+    """
+
+    def __init__(
+        self,
+        homeserver: str,
+        connect_timeout: float = 5,
+        read_timeout: float = 60,
+        max_connections: int = 10,
+        http2: bool = True,
+    ):
+        self.homeserver = homeserver.rstrip("/")
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        access_token: Optional[str] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Send a request to the homeserver and return its JSON body."""
+        if access_token:
+            kwargs["headers"] = {
+                "Authorization": f"Bearer {access_token}",
+                **(kwargs.get("headers") or {}),
+            }
+
+        response = await self.client.request(method, f"{self.homeserver}{path}", **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_user_info(self, user_id: str, access_token: str) -> Dict[str, Any]:
+        """Fetch user information from the Synapse admin API."""
+        return await self.request(
+            "GET",
+            f"/_synapse/admin/v2/users/{urllib.parse.quote(user_id)}",
+            access_token,
+        )
+
+    async def get_displaynames(
+        self, user_ids: Iterable[str], access_token: str
+    ) -> Dict[str, str]:
+        """
+        Fetch the displaynames of several users concurrently.
+
+        Returns:
+            Dict mapping user ID to displayname; empty if the user has none
+            or could not be fetched
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        results = await asyncio.gather(
+            *(self.get_user_info(user_id, access_token) for user_id in user_ids),
+            return_exceptions=True,
+        )
+        return {
+            user_id: "" if isinstance(result, Exception) else result.get("displayname") or ""
+            for user_id, result in zip(user_ids, results)
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _create_client() -> AsyncMatrixClient:
+    config = settings.MATRIX_CONFIG
+    return AsyncMatrixClient(
+        homeserver=config["HOMESERVER"],
+        connect_timeout=config.get("CONNECT_TIMEOUT", 5),
+        read_timeout=config.get("READ_TIMEOUT", 60),
+        max_connections=config.get("ASYNC_MAX_CONNECTIONS", 10),
+        http2=config.get("HTTP2", True),
+    )
+
+
+class SyncMatrixClient:
+    """
+    Blocking facade over AsyncMatrixClient for sync callers.
+
+    Coroutines run on one background event loop thread, so every thread
+    of the process shares its multiplexed connections. Any AsyncMatrixClient
+    coroutine method can be called as a blocking method, e.g.
+    get_sync_matrix_client().get_displaynames(user_ids, access_token).
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="matrix-async", daemon=True
+        )
+        self.thread.start()
+        self.client = _create_client()
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the background loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def __getattr__(self, name: str):
+        if name == "client":
+            # Not set yet: __init__ failed
+            raise AttributeError(name)
+        method = getattr(self.client, name)
+        if not asyncio.iscoroutinefunction(method):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self.run(method(*args, **kwargs))
+
+        call.__doc__ = method.__doc__
+        return call
+
+
+_sync_client: Optional[SyncMatrixClient] = None
+_sync_client_lock = threading.Lock()
+
+
+def get_sync_matrix_client() -> SyncMatrixClient:
+    """Return the process-wide SyncMatrixClient."""
+    global _sync_client
+
+    with _sync_client_lock:
+        if _sync_client is None:
+            _sync_client = SyncMatrixClient()
+        return _sync_client
+
@@ -0,0 +1,211 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.services.llm_provider import get_light_model, get_provider
+
+JSON_TYPES = {"string", "number", "integer", "boolean", "object", "array", "null"}
+
+REPAIR_PROMPT = """The response below was supposed to be a JSON value matching the JSON schema below, but it is not valid JSON or does not match the schema (see errors).
+Return ONLY the corrected JSON. Keep all of its content; only fix the syntax and structure."""
+
+
+def schema_from_output_format(output_format: Any) -> Dict[str, Any]:
+    """
+    Derive a JSON schema from an output_format example.
+
+    Dicts become objects and lists become arrays of their first item.
+    Descriptors that are JSON type names ("string", "string | null") are
+    typed and required; "a | b | c" of other words is an optional enum; any
+    other text is an optional hint, typed only if it starts with "object".
+    A key like "<room key>" stands for any key of that object.
+    """
+    if isinstance(output_format, dict):
+        properties = {}
+        required = []
+        additional = True
+        for key, value in output_format.items():
+            if key.startswith("<") and key.endswith(">"):
+                additional = schema_from_output_format(value)
+                continue
+            properties[key] = schema_from_output_format(value)
+            if _is_required(value):
+                required.append(key)
+
+        schema = {"type": "object", "properties": properties}
+        if required:
+            schema["required"] = required
+        if additional is not True:
+            schema["additionalProperties"] = additional
+        return schema
+
+    if isinstance(output_format, list):
+        items = schema_from_output_format(output_format[0]) if output_format else {}
+        return {"type": "array", "items": items}
+
+    if isinstance(output_format, str):
+        parts = [part.strip() for part in output_format.split("|")]
+        if all(part in JSON_TYPES for part in parts):
+            return {"type": parts[0] if len(parts) == 1 else parts}
+        if len(parts) > 1 and all(re.fullmatch(r"[\w-]+", part) for part in parts):
+            return {"enum": parts}
+        if output_format.lower().startswith("object"):
+            return {"type": "object"}
+
+    return {}
+
+
+def _is_required(output_format: Any) -> bool:
+    if isinstance(output_format, (dict, list)):
+        return True
+    if isinstance(output_format, str):
+        return all(part.strip() in JSON_TYPES for part in output_format.split("|"))
+    return False
+
+
+def validate(instance: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Validate an instance against the subset of JSON schema produced by
+    schema_from_output_format.
+
+    Returns:
+        List of error messages; empty if valid
+    """
+    errors = []
+
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(instance, name) for name in types):
+            return [f"{path}: expected {' or '.join(types)}"]
+
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: expected one of {', '.join(schema['enum'])}")
+
+    if isinstance(instance, dict):
+        for key in schema.get("required", []):
+            if key not in instance:
+                errors.append(f"{path}: missing {key}")
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        for key, value in instance.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif isinstance(additional, dict):
+                errors.extend(validate(value, additional, f"{path}.{key}"))
+
+    if isinstance(instance, list) and schema.get("items"):
+        for index, item in enumerate(instance):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+
+    return errors
+
+
+def _is_type(instance: Any, name: str) -> bool:
+    if name == "integer":
+        return isinstance(instance, int) and not isinstance(instance, bool)
+    if name == "number":
+        return isinstance(instance, (int, float)) and not isinstance(instance, bool)
+    return isinstance(
+        instance,
+        {
+            "string": str,
+            "boolean": bool,
+            "object": dict,
+            "array": list,
+            "null": type(None),
+        }[name],
+    )
+
+
+def parse_json(content: str) -> Optional[Any]:
+    """
+    Parse a JSON response, tolerating code fences and text around the object.
+
+    Returns:
+        The parsed value, or None if no JSON object could be parsed
+    """
+    if not content:
+        return None
+
+    text = content.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    start_idx = text.find("{")
+    end_idx = text.rfind("}") + 1
+    if start_idx != -1 and end_idx > start_idx:
+        try:
+            return json.loads(text[start_idx:end_idx])
+        except ValueError:
+            pass
+    return None
+
+
+def parse_structured(
+    content: str, schema: Dict[str, Any], model: str, repair: bool = True
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Parse and validate a structured response, with at most one repair call.
+
+    The repair call sends only the broken response, the schema and the
+    errors (not the original context) to the light model if one is set, so
+    it costs a fraction of regenerating the response.
+
+    Args:
+        content: Raw completion content
+        schema: Expected JSON schema
+        model: Model that produced the content (used for repair if there
+            is no light model)
+        repair: Whether to make the repair call; if not, invalid content
+            is only reported with {"repaired": False}
+
+    Returns:
+        Tuple of (parsed object or None, usage of the repair call if any)
+    """
+    parsed = parse_json(content)
+    errors = validate(parsed, schema) if parsed is not None else ["not valid JSON"]
+    if not errors:
+        return parsed, {}
+    if not repair:
+        return (parsed if isinstance(parsed, dict) else None), {"repaired": False}
+
+    repair_model = get_light_model() or model
+    repair_messages = [
+        {"role": "system", "content": REPAIR_PROMPT},
+        {
+            "role": "user",
+            "content": json.dumps(
+                {"schema": schema, "errors": errors[:20], "response": content},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ),
+        },
+    ]
+
+    repaired = None
+    usage = {"repaired": True, "repair_model": repair_model}
+    try:
+        repaired_content, repair_usage = get_provider(repair_model).complete(
+            repair_model, repair_messages, json_schema=schema
+        )
+        usage["repair_prompt_tokens"] = repair_usage.get("prompt_tokens")
+        usage["repair_completion_tokens"] = repair_usage.get("completion_tokens")
+        repaired = parse_json(repaired_content)
+    except Exception:
+        pass
+
+    if isinstance(repaired, dict) and not validate(repaired, schema):
+        return repaired, usage
+
+    # Prefer a parsed but imperfect object over losing the structured fields
+    for candidate in (parsed, repaired):
+        if isinstance(candidate, dict):
+            return candidate, usage
+    return None, usage
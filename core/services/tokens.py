@@ -0,0 +1,125 @@
+import copy
+import json
+from typing import Any, Dict, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without a model tokenizer.
+
+    Latin text averages about four characters per token; characters outside
+    ASCII (emoji, accented and non-Latin scripts) are usually a token or more
+    each, so they are counted individually.
+    """
+    if not text:
+        return 0
+
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    ascii_chars = len(text) - non_ascii
+    words = len(text.split())
+
+    return max(1, int(max(ascii_chars / 4, words * 0.75)) + non_ascii)
+
+
+def estimate_context_tokens(context: Dict[str, Any]) -> int:
+    """Estimate the tokens of a context serialized as compact JSON."""
+    return estimate_tokens(
+        json.dumps(context, ensure_ascii=False, separators=(",", ":"), default=str)
+    )
+
+
+class ContextPacker:
+    """
+    Fit an LLM context into a token budget.
+
+    Cheaper-to-lose parts go first: long pending_todos and the previous
+    summary are compressed, then older messages are trimmed and finally
+    dropped. The newest keep_recent messages are always kept in full.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        keep_recent: int = 20,
+        max_todo_chars: int = 200,
+        max_summary_chars: int = 1500,
+        max_message_chars: int = 500,
+    ):
+        self.budget = budget
+        self.keep_recent = keep_recent
+        self.max_todo_chars = max_todo_chars
+        self.max_summary_chars = max_summary_chars
+        self.max_message_chars = max_message_chars
+
+    def pack(self, context: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        Pack a context into the budget.
+
+        Args:
+            context: LLM context dict (left unmodified)
+
+        Returns:
+            Tuple of (packed context, info dict with estimated_tokens_before,
+            estimated_tokens, trimmed_messages and dropped_messages)
+        """
+        tokens_before = estimate_context_tokens(context)
+        info = {
+            "budget": self.budget,
+            "estimated_tokens_before": tokens_before,
+            "estimated_tokens": tokens_before,
+            "trimmed_messages": 0,
+            "dropped_messages": 0,
+        }
+        if tokens_before <= self.budget:
+            return context, info
+
+        packed = copy.deepcopy(context)
+
+        for step in (
+            self._compress_todos,
+            self._compress_previous_summary,
+            self._trim_old_messages,
+            self._drop_old_messages,
+        ):
+            step(packed, info)
+            info["estimated_tokens"] = estimate_context_tokens(packed)
+            if info["estimated_tokens"] <= self.budget:
+                break
+
+        return packed, info
+
+    def _truncate(self, text, limit: int):
+        if not isinstance(text, str) or len(text) <= limit:
+            return text
+        return text[:limit].rstrip() + "…"
+
+    def _compress_todos(self, context, info):
+        for todo in context.get("pending_todos") or []:
+            todo["description"] = self._truncate(todo.get("description"), self.max_todo_chars)
+            todo["notes"] = self._truncate(todo.get("notes"), self.max_todo_chars // 2)
+
+    def _compress_previous_summary(self, context, info):
+        previous = context.get("previous_messages")
+        if not previous:
+            return
+        previous["summary"] = self._truncate(previous.get("summary"), self.max_summary_chars)
+        if previous.get("todo_list"):
+            previous["todo_list"] = previous["todo_list"][-10:]
+
+    def _trim_old_messages(self, context, info):
+        messages = context.get("messages") or []
+        for message in messages[: max(0, len(messages) - self.keep_recent)]:
+            content = message.get("content", "")
+            if len(content) > self.max_message_chars:
+                message["content"] = self._truncate(content, self.max_message_chars)
+                info["trimmed_messages"] += 1
+
+    def _drop_old_messages(self, context, info):
+        messages = context.get("messages") or []
+        while len(messages) > self.keep_recent:
+            if estimate_context_tokens(context) <= self.budget:
+                break
+            # Drop in batches so long backlogs don't re-serialize per message
+            drop = max(1, (len(messages) - self.keep_recent) // 4)
+            del messages[:drop]
+            info["dropped_messages"] += drop
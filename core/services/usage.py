@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+from django.db.models import Avg, Count, F, Max, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate
+
+
+class UsageReportService:
+    """
+    LLM spend and latency of room summaries, aggregated per day, subscriber
+    or room, for the admin and dashboard.
+    """
+
+    # Grouping name -> fields the rows are grouped (and labelled) by
+    GROUPS = {
+        "day": ("day",),
+        "subscriber": ("room__subscriber_id", "room__subscriber__full_name"),
+        "room": ("room_id", "room__room_name", "room__room_id", "room__subscriber__full_name"),
+    }
+
+    def aggregate(
+        self, queryset: QuerySet, group_by: str, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate RoomSummary rows.
+
+        Args:
+            queryset: RoomSummary queryset, e.g. a filtered admin changelist
+            group_by: One of GROUPS
+            limit: Maximum number of rows
+
+        Returns:
+            Rows with the GROUPS fields, summaries, degraded, prompt_tokens,
+            completion_tokens, cost, avg/max llm and total latency; days are
+            newest first, everything else most expensive first
+        """
+        fields = self.GROUPS[group_by]
+        if group_by == "day":
+            queryset = queryset.annotate(day=TruncDate("created_at"))
+
+        rows = (
+            queryset.order_by()
+            .values(*fields)
+            .annotate(
+                summaries=Count("id"),
+                degraded=Count("id", filter=Q(is_degraded=True)),
+                prompt_tokens=Sum("prompt_tokens"),
+                completion_tokens=Sum("completion_tokens"),
+                cost=Sum("cost"),
+                avg_llm_latency_ms=Avg("llm_latency_ms"),
+                max_llm_latency_ms=Max("llm_latency_ms"),
+                avg_total_latency_ms=Avg("total_latency_ms"),
+                max_total_latency_ms=Max("total_latency_ms"),
+            )
+        )
+
+        if group_by == "day":
+            rows = rows.order_by("-day")
+        else:
+            rows = rows.order_by(
+                F("cost").desc(nulls_last=True),
+                F("prompt_tokens").desc(nulls_last=True),
+            )
+
+        return list(rows[:limit] if limit else rows)
+
+    def totals(self, queryset: QuerySet) -> Dict[str, Any]:
+        """Overall summaries, tokens, cost and average latency of a queryset."""
+        return queryset.aggregate(
+            summaries=Count("id"),
+            prompt_tokens=Sum("prompt_tokens"),
+            completion_tokens=Sum("completion_tokens"),
+            cost=Sum("cost"),
+            avg_llm_latency_ms=Avg("llm_latency_ms"),
+            avg_total_latency_ms=Avg("total_latency_ms"),
+        )
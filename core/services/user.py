@@ -1,8 +1,9 @@
-import requests
 import urllib.parse
 from typing import Dict, Any
 from django.conf import settings
 
+from core.services.http import get_matrix_client
+
 
 class UserService:
     """Service for fetching user information from Matrix."""
@@ -10,6 +11,7 @@ class UserService:
     def __init__(self, access_token: str):
         self.access_token = access_token
         self.homeserver = settings.MATRIX_CONFIG["HOMESERVER"]
+        self.http = get_matrix_client()
 
     def get_user_info(self, user_id: str) -> Dict[str, Any]:
         """
@@ -23,9 +25,8 @@ class UserService:
         """
         encoded_user_id = urllib.parse.quote(user_id)
         url = f"{self.homeserver}/_synapse/admin/v2/users/{encoded_user_id}"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = self.http.get(url, access_token=self.access_token)
         response.raise_for_status()
 
         return response.json()
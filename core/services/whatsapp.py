@@ -1,7 +1,8 @@
-import requests
 from typing import Optional, List, Dict, Any
 from django.conf import settings
 
+from core.services.http import get_matrix_client
+
 
 class WhatsAppService:
     """Service for interacting with WhatsApp-bridged rooms via Matrix."""
@@ -9,6 +10,7 @@ class WhatsAppService:
     def __init__(self, access_token: str):
         self.access_token = access_token
         self.homeserver = settings.MATRIX_CONFIG['HOMESERVER']
+        self.http = get_matrix_client()
 
     def list_rooms(self, **kwargs) -> List[Dict[str, Any]]:
         """
@@ -35,9 +37,7 @@ class WhatsAppService:
             if next_batch:
                 params["from"] = next_batch
 
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, access_token=self.access_token, params=params)
             response.raise_for_status()
 
             data = response.json()
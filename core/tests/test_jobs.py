@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ConversationProcessingState, Subscriber, SubscriberRoom, SummaryJob
+from core.services.llm import LLMService
+from core.worker import SummaryJobQueue
+
+
+class SummaryJobQueueTests(TestCase):
+    def setUp(self):
+        self.subscriber = Subscriber.objects.create(
+            full_name="Subscriber", matrix_room_id="!control:example.org"
+        )
+        self.room = SubscriberRoom.objects.create(
+            subscriber=self.subscriber,
+            platform="whatsapp",
+            room_id="!room:example.org",
+            room_name="Room",
+        )
+        self.queue = SummaryJobQueue(worker_id="test", backoff_seconds=30)
+
+    def get_state(self):
+        return ConversationProcessingState.objects.get(room=self.room)
+
+    def test_enqueue_marks_rooms_ready(self):
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+
+        self.assertEqual(self.get_state().status, ConversationProcessingState.STATUS_READY)
+        self.assertTrue(
+            self.queue.has_unfinished(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        )
+
+    def test_enqueue_leaves_processing_rooms_alone(self):
+        ConversationProcessingState.objects.create(
+            room=self.room,
+            status=ConversationProcessingState.STATUS_PROCESSING,
+            processing_started_at=timezone.now(),
+        )
+
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+
+        self.assertEqual(
+            self.get_state().status, ConversationProcessingState.STATUS_PROCESSING
+        )
+
+    def test_claim_runs_job_once(self):
+        job = self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+
+        claimed = self.queue.claim()
+
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, SummaryJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(claimed.locked_by, "test")
+        self.assertIsNone(self.queue.claim())
+
+    def test_claimed_job_leaves_room_claimable(self):
+        # The run that summarizes the rooms claims them, not the job
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        self.queue.claim()
+
+        state = self.get_state()
+        self.assertEqual(state.status, ConversationProcessingState.STATUS_READY)
+        self.assertTrue(LLMService().claim_room(state))
+
+    def test_claim_respects_delay_and_priority(self):
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ALL, delay=60)
+        self.assertIsNone(self.queue.claim())
+
+        low = self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        high = self.queue.enqueue(self.subscriber, SummaryJob.KIND_ALL, priority=10)
+
+        self.assertEqual(self.queue.claim().id, high.id)
+        self.assertEqual(self.queue.claim().id, low.id)
+
+    def test_abandoned_job_is_reclaimed(self):
+        job = self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        self.queue.claim()
+        SummaryJob.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        claimed = self.queue.claim()
+
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.attempts, 2)
+
+    def test_fail_retries_with_backoff(self):
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        job = self.queue.claim()
+
+        self.assertTrue(self.queue.fail(job, "boom"))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.STATUS_PENDING)
+        self.assertEqual(job.last_error, "boom")
+        self.assertGreater(job.available_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(self.get_state().status, ConversationProcessingState.STATUS_READY)
+
+    def test_fail_after_last_attempt(self):
+        job = self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        SummaryJob.objects.filter(pk=job.pk).update(max_attempts=1)
+        job = self.queue.claim()
+
+        self.assertFalse(self.queue.fail(job, "boom"))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.STATUS_FAILED)
+        state = self.get_state()
+        self.assertEqual(state.status, ConversationProcessingState.STATUS_FAILED)
+        self.assertEqual(state.failure_reason, "boom")
+
+    def test_complete(self):
+        self.queue.enqueue(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        job = self.queue.claim()
+
+        self.queue.complete(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.STATUS_DONE)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(
+            self.queue.has_unfinished(self.subscriber, SummaryJob.KIND_ROOM, room=self.room)
+        )
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.services.llm_limiter import AdaptiveLimiter, LLMQueueTimeout, llm_tenant
+
+
+class AdaptiveLimiterTests(SimpleTestCase):
+    def test_fast_requests_raise_limit(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=4)
+
+        limiter.release(limiter.acquire())
+
+        self.assertEqual(limiter.limit, 2.5)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_limit_stays_within_maximum(self):
+        limiter = AdaptiveLimiter(initial=4, maximum=4)
+
+        limiter.release(limiter.acquire())
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_throttle_halves_limit_once_per_round(self):
+        limiter = AdaptiveLimiter(initial=8, default_retry_after=0)
+        first = limiter.acquire()
+        second = limiter.acquire()
+
+        limiter.release(first, throttled=True)
+        limiter.release(second, throttled=True)
+
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.counters["throttled"], 2)
+
+    def test_overload_respects_minimum(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1)
+
+        limiter.release(limiter.acquire(), overloaded=True)
+
+        self.assertEqual(limiter.limit, 1)
+
+    def test_retry_after_blocks_new_requests(self):
+        limiter = AdaptiveLimiter(initial=4, queue_timeout=0.05)
+
+        limiter.release(limiter.acquire(), throttled=True, retry_after=60)
+
+        self.assertGreater(limiter.stats()["blocked_for_seconds"], 50)
+        with self.assertRaises(LLMQueueTimeout):
+            limiter.acquire()
+
+    def test_cancelled_request_keeps_limit(self):
+        limiter = AdaptiveLimiter(initial=2)
+
+        limiter.release(limiter.acquire(), cancelled=True)
+
+        self.assertEqual(limiter.limit, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_queue_timeout(self):
+        limiter = AdaptiveLimiter(initial=1, queue_timeout=0.05)
+        limiter.acquire()
+
+        with self.assertRaises(LLMQueueTimeout):
+            limiter.acquire()
+        self.assertEqual(limiter.counters["queue_timeouts"], 1)
+        self.assertEqual(limiter.stats()["queued"], 0)
+
+    def test_fair_queueing_across_tenants(self):
+        # A tenant arriving behind another's backlog waits for one of its
+        # requests, not all of them
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        order = []
+
+        def request(tenant):
+            with llm_tenant(tenant):
+                started = limiter.acquire()
+                order.append(tenant)
+                limiter.release(started)
+
+        held = limiter.acquire()
+        threads = []
+        for tenant in ["busy", "busy", "busy", "quiet"]:
+            thread = threading.Thread(target=request, args=(tenant,))
+            thread.start()
+            threads.append(thread)
+            self.wait_for_queued(limiter, len(threads))
+
+        limiter.release(held)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(order, ["busy", "quiet", "busy", "busy"])
+
+    def test_weight_shares_capacity(self):
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        order = []
+
+        def request(tenant, weight):
+            with llm_tenant(tenant, weight):
+                started = limiter.acquire()
+                order.append(tenant)
+                limiter.release(started)
+
+        held = limiter.acquire()
+        threads = []
+        for tenant, weight in [("basic", 1)] * 2 + [("premium", 2)] * 2:
+            thread = threading.Thread(target=request, args=(tenant, weight))
+            thread.start()
+            threads.append(thread)
+            self.wait_for_queued(limiter, len(threads))
+
+        limiter.release(held)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(order, ["premium", "basic", "premium", "basic"])
+
+    def wait_for_queued(self, limiter, count):
+        deadline = time.monotonic() + 5
+        while limiter.stats()["queued"] < count:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
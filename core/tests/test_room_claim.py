@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ConversationProcessingState, Subscriber, SubscriberRoom
+from core.services.llm import LLMService, RoomBusyError
+
+
+class RoomClaimTests(TestCase):
+    def setUp(self):
+        subscriber = Subscriber.objects.create(full_name="Subscriber")
+        room = SubscriberRoom.objects.create(
+            subscriber=subscriber,
+            platform="whatsapp",
+            room_id="!room:example.org",
+            room_name="Room",
+        )
+        self.state = ConversationProcessingState.objects.create(room=room)
+        self.llm_service = LLMService()
+
+    def other_run_state(self):
+        """The same room as loaded by a concurrent run."""
+        return ConversationProcessingState.objects.get(pk=self.state.pk)
+
+    def test_claim_idle_room(self):
+        self.assertTrue(self.llm_service.claim_room(self.state))
+
+        self.assertEqual(self.state.status, ConversationProcessingState.STATUS_PROCESSING)
+        self.assertIsNotNone(self.state.processing_started_at)
+
+    def test_claimed_room_is_not_claimed_twice(self):
+        self.assertTrue(self.llm_service.claim_room(self.state))
+
+        self.assertFalse(self.llm_service.claim_room(self.other_run_state()))
+
+    def test_stale_claim_is_taken_over(self):
+        self.llm_service.claim_room(self.state)
+        ConversationProcessingState.objects.filter(pk=self.state.pk).update(
+            processing_started_at=timezone.now()
+            - timedelta(minutes=LLMService.STALE_PROCESSING_MINUTES + 1)
+        )
+
+        self.assertTrue(self.llm_service.claim_room(self.other_run_state()))
+
+    def test_release_room(self):
+        self.llm_service.claim_room(self.state)
+
+        self.llm_service.release_room(self.state)
+
+        other = self.other_run_state()
+        self.assertEqual(other.status, ConversationProcessingState.STATUS_IDLE)
+        self.assertTrue(self.llm_service.claim_room(other))
+
+    def test_claim_or_wait_gives_up(self):
+        self.llm_service.claim_room(self.state)
+
+        with self.assertRaises(RoomBusyError):
+            self.llm_service.claim_room_or_wait(
+                self.other_run_state(), timeout=0.05, interval=0.01
+            )
+
+    def test_claim_or_wait_rereads_state(self):
+        synced_at = timezone.now()
+        ConversationProcessingState.objects.filter(pk=self.state.pk).update(
+            last_message_synced_at=synced_at
+        )
+
+        self.llm_service.claim_room_or_wait(self.state, timeout=0)
+
+        self.assertEqual(self.state.last_message_synced_at, synced_at)
@@ -1,9 +1,13 @@
+from datetime import timedelta
+
 from django.db import models
 from django.db.models import Count, Q
+from django.utils import timezone
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from core.models import TodoList, Subscriber, SubscriberRoom, RoomSummary
+from core.services.usage import UsageReportService
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -37,4 +41,14 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             "room", "room__subscriber"
         ).order_by("-created_at")[:5]
 
+        # LLM spend and latency over the last week
+        week = RoomSummary.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=7)
+        )
+        report = UsageReportService()
+        context["usage_totals"] = report.totals(week)
+        context["usage_by_day"] = report.aggregate(week, "day")
+        context["usage_by_subscriber"] = report.aggregate(week, "subscriber", limit=5)
+        context["usage_by_room"] = report.aggregate(week, "room", limit=5)
+
         return context
@@ -0,0 +1,6 @@
+from core.worker.dispatch import SubscriberDispatcher
+from core.worker.jobs import SummaryJobQueue
+from core.worker.schedule import PollScheduler
+from core.worker.shard import ShardCoordinator
+
+__all__ = ["SubscriberDispatcher", "SummaryJobQueue", "PollScheduler", "ShardCoordinator"]
@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from django.db import close_old_connections, connections
+
+
+class SubscriberDispatcher:
+    """
+    Bounded thread pool that runs tasks concurrently across keys but
+    strictly in submission order for the same key.
+
+    Each task runs on a pool thread with its own Django DB connection,
+    which is closed once the task finishes.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        on_error: Optional[Callable[[Hashable, Exception], None]] = None,
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="subscriber"
+        )
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        # key -> tasks waiting behind the one currently running for that key
+        self._queues: Dict[Hashable, deque] = {}
+
+    def is_busy(self, key: Hashable) -> bool:
+        """Return True if a task for this key is running or queued."""
+        with self._lock:
+            return key in self._queues
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs):
+        """Queue fn for key; it starts after all earlier tasks for key finish."""
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append((fn, args, kwargs))
+                return
+            self._queues[key] = deque()
+
+        self.executor.submit(self._run, key, fn, args, kwargs)
+
+    def _run(self, key, fn, args, kwargs):
+        while True:
+            close_old_connections()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(key, e)
+            finally:
+                connections.close_all()
+
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                fn, args, kwargs = queue.popleft()
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import ConversationProcessingState, SummaryJob
+
+
+class SummaryJobQueue:
+    """
+    Durable queue of summary requests backed by the SummaryJob table.
+
+    Executors claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of them can run without handing the same job out twice. A running job whose
+    lock is older than the visibility timeout is assumed abandoned and becomes
+    claimable again. Failed attempts are retried with exponential backoff.
+
+    The ConversationProcessingState of each affected room mirrors the job:
+    ready while queued or waiting for a retry, failed when retries run out.
+    Claiming a job does not claim its rooms: the run that summarizes them
+    does, room by room (see LLMService.claim_room), so a job never holds a
+    room it is not summarizing yet and never blocks its own run.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = "",
+        visibility_timeout: int = 600,
+        backoff_seconds: int = 30,
+    ):
+        self.worker_id = worker_id
+        self.visibility_timeout = timedelta(seconds=visibility_timeout)
+        self.backoff_seconds = backoff_seconds
+
+    def has_unfinished(self, subscriber, kind: str, room=None) -> bool:
+        """Return True if the same request is already queued or running."""
+        return SummaryJob.objects.filter(
+            subscriber=subscriber,
+            kind=kind,
+            room=room,
+            status__in=[SummaryJob.STATUS_PENDING, SummaryJob.STATUS_RUNNING],
+        ).exists()
+
+    def enqueue(
+        self,
+        subscriber,
+        kind: str,
+        room=None,
+        rooms: Iterable = (),
+        priority: int = 0,
+        delay: int = 0,
+        attempts: int = 0,
+    ) -> SummaryJob:
+        """
+        Queue a summary job.
+
+        Args:
+            subscriber: Subscriber who asked for the summary
+            kind: SummaryJob.KIND_ROOM or SummaryJob.KIND_ALL
+            room: Target SubscriberRoom for room jobs
+            rooms: Rooms covered by the job, marked ready
+            priority: Higher priority jobs are claimed first
+            delay: Seconds before the job becomes claimable
+            attempts: Attempts already spent (for follow-up retries)
+
+        Returns:
+            The created SummaryJob
+        """
+        job = SummaryJob.objects.create(
+            subscriber=subscriber,
+            kind=kind,
+            room=room,
+            priority=priority,
+            attempts=attempts,
+            available_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+        self._set_room_status(
+            rooms or ([room] if room else []),
+            ConversationProcessingState.STATUS_READY,
+        )
+        return job
+
+    def claim(self) -> Optional[SummaryJob]:
+        """Claim the next available job, or return None if there is none."""
+        while True:
+            now = timezone.now()
+
+            with transaction.atomic():
+                job = (
+                    SummaryJob.objects.select_for_update(skip_locked=True)
+                    .filter(
+                        Q(status=SummaryJob.STATUS_PENDING)
+                        | Q(
+                            status=SummaryJob.STATUS_RUNNING,
+                            locked_at__lt=now - self.visibility_timeout,
+                        ),
+                        available_at__lte=now,
+                    )
+                    .order_by("-priority", "available_at", "id")
+                    .first()
+                )
+
+                if not job:
+                    return None
+
+                # An abandoned job that already used up its attempts
+                if job.attempts >= job.max_attempts:
+                    self._finish_failed(job, job.last_error or "Visibility timeout exceeded")
+                    continue
+
+                job.status = SummaryJob.STATUS_RUNNING
+                job.attempts = F("attempts") + 1
+                job.locked_by = self.worker_id
+                job.locked_at = now
+                job.save(
+                    update_fields=[
+                        "status",
+                        "attempts",
+                        "locked_by",
+                        "locked_at",
+                        "updated_at",
+                    ]
+                )
+
+            job.refresh_from_db()
+            return job
+
+    def complete(self, job: SummaryJob):
+        """Mark a job as done."""
+        job.status = SummaryJob.STATUS_DONE
+        job.finished_at = timezone.now()
+        job.last_error = ""
+        job.save(update_fields=["status", "finished_at", "last_error", "updated_at"])
+
+    def fail(self, job: SummaryJob, error: str) -> bool:
+        """
+        Record a failed attempt.
+
+        Returns:
+            True if the job will be retried, False if it is permanently failed
+        """
+        if job.attempts >= job.max_attempts:
+            self._finish_failed(job, error)
+            return False
+
+        job.status = SummaryJob.STATUS_PENDING
+        job.available_at = timezone.now() + timedelta(
+            seconds=self.backoff_seconds * 2 ** (job.attempts - 1)
+        )
+        job.last_error = error
+        job.locked_by = ""
+        job.locked_at = None
+        job.save(
+            update_fields=[
+                "status",
+                "available_at",
+                "last_error",
+                "locked_by",
+                "locked_at",
+                "updated_at",
+            ]
+        )
+        self._set_room_status(
+            self.get_rooms(job), ConversationProcessingState.STATUS_READY
+        )
+        return True
+
+    def get_rooms(self, job: SummaryJob):
+        """Rooms covered by a job."""
+        if job.kind == SummaryJob.KIND_ROOM:
+            return [job.room] if job.room else []
+        return list(job.subscriber.rooms.filter(is_active=True))
+
+    def _finish_failed(self, job: SummaryJob, error: str):
+        job.status = SummaryJob.STATUS_FAILED
+        job.finished_at = timezone.now()
+        job.last_error = error
+        job.save(update_fields=["status", "finished_at", "last_error", "updated_at"])
+
+        for state in self._get_states(self.get_rooms(job)):
+            state.status = ConversationProcessingState.STATUS_FAILED
+            state.failure_reason = error
+            state.save(update_fields=["status", "failure_reason", "updated_at"])
+
+    def _get_states(self, rooms):
+        states = []
+        for room in rooms:
+            state, _ = ConversationProcessingState.objects.get_or_create(
+                room=room,
+                defaults={"status": ConversationProcessingState.STATUS_IDLE},
+            )
+            states.append(state)
+        return states
+
+    def _set_room_status(self, rooms, status: str):
+        for state in self._get_states(rooms):
+            # Never take over a room another run is summarizing
+            if state.status == ConversationProcessingState.STATUS_PROCESSING:
+                continue
+            state.status = status
+            state.save(update_fields=["status", "updated_at"])
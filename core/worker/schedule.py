@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List
+
+
+class PollScheduler:
+    """
+    Per-key poll schedule with exponential backoff while idle.
+
+    Every key keeps its own interval. Polls that see nothing new multiply the
+    interval by backoff_factor up to max_interval; a poll that sees activity
+    snaps it back to min_interval.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff_factor: float = 2.0,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff_factor = backoff_factor
+        self._lock = threading.Lock()
+        # key -> {"next_at", "interval"}
+        self._entries: Dict[Hashable, dict] = {}
+
+    def due(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Return the keys that should be polled now; unseen keys are always due."""
+        now = time.monotonic()
+        keys = list(keys)
+
+        with self._lock:
+            # Drop keys that are no longer scheduled (e.g. inactive subscribers)
+            for key in set(self._entries) - set(keys):
+                del self._entries[key]
+
+            return [
+                key
+                for key in keys
+                if key not in self._entries or self._entries[key]["next_at"] <= now
+            ]
+
+    def record(self, key: Hashable, active: bool):
+        """
+        Record the outcome of a poll and schedule the next one.
+
+        Args:
+            key: Scheduled key (subscriber id)
+            active: Whether the poll found anything new
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.setdefault(key, {"interval": self.min_interval})
+
+            if active:
+                entry["interval"] = self.min_interval
+            else:
+                entry["interval"] = min(
+                    entry["interval"] * self.backoff_factor, self.max_interval
+                )
+            entry["next_at"] = now + entry["interval"]
+
+    def seconds_until_next(self) -> float:
+        """Seconds until the earliest scheduled poll."""
+        with self._lock:
+            if not self._entries:
+                return self.min_interval
+            next_at = min(entry["next_at"] for entry in self._entries.values())
+        return max(0.0, next_at - time.monotonic())
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import List, Optional
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from core.models import WorkerHeartbeat
+
+
+class ShardCoordinator:
+    """
+    Partition subscribers across summarize_rooms replicas.
+
+    Every replica heartbeats a WorkerHeartbeat row from a background thread.
+    Replicas whose heartbeat is older than the lease are considered dead, and
+    subscribers are assigned to the live set with rendezvous hashing, so only
+    the dead replica's subscribers move when membership changes.
+
+    While membership is converging two replicas can briefly both claim a
+    subscriber; a Postgres advisory lock around each subscriber's processing
+    keeps them from handling it at the same time.
+    """
+
+    # Advisory lock namespace ("FRDY"), placed in the high 32 bits of the key
+    LOCK_NAMESPACE = 0x46524459
+
+    def __init__(self, worker_id: Optional[str] = None, lease_seconds: int = 30):
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.lease = timedelta(seconds=lease_seconds)
+        self.members: List[str] = [self.worker_id]
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Register this replica and keep its heartbeat fresh in the background."""
+        self.heartbeat()
+        self._thread = threading.Thread(
+            target=self._heartbeat_loop, name="shard-heartbeat", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop heartbeating and deregister so peers rebalance immediately."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        WorkerHeartbeat.objects.filter(worker_id=self.worker_id).delete()
+
+    def _heartbeat_loop(self):
+        interval = self.lease.total_seconds() / 3
+        while not self._stopped.wait(interval):
+            try:
+                close_old_connections()
+                self.heartbeat()
+            except Exception:
+                # A missed beat is tolerated; the lease covers a few of them
+                pass
+        connection.close()
+
+    def heartbeat(self):
+        """Refresh this replica's lease and reload the live membership."""
+        now = timezone.now()
+        WorkerHeartbeat.objects.update_or_create(
+            worker_id=self.worker_id, defaults={"heartbeat_at": now}
+        )
+
+        # Forget replicas that have been gone for a long time
+        WorkerHeartbeat.objects.filter(heartbeat_at__lt=now - self.lease * 10).delete()
+
+        members = list(
+            WorkerHeartbeat.objects.filter(
+                heartbeat_at__gte=now - self.lease
+            ).values_list("worker_id", flat=True)
+        )
+        self.members = sorted(set(members) | {self.worker_id})
+
+    def owns(self, subscriber_id: int) -> bool:
+        """Return True if this replica is responsible for the subscriber."""
+        members = self.members
+
+        def score(worker_id):
+            key = f"{worker_id}:{subscriber_id}".encode()
+            return hashlib.sha1(key).digest()
+
+        return max(members, key=score) == self.worker_id
+
+    @contextmanager
+    def subscriber_lock(self, subscriber_id: int):
+        """
+        Try to take the subscriber's advisory lock on this thread's connection.
+
+        Yields True if acquired, False if another replica is processing it.
+        """
+        lock_key = (self.LOCK_NAMESPACE << 32) | subscriber_id
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_key])
+            acquired = cursor.fetchone()[0]
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_key])
@@ -81,3 +81,99 @@ USE_THOUSAND_SEPARATOR = True
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "login"
+
+# LLM summarization
+LLM_CONFIG = {
+    # Provider (see LLM_PROVIDERS) for models not listed in MODEL_PROVIDERS
+    "DEFAULT_PROVIDER": "nanogpt",
+    "MODEL_PROVIDERS": {},
+    # Adaptive (AIMD) concurrency limit per provider; a provider's own
+    # LLM_PROVIDERS entry may override any of these under "LIMITER"
+    "LIMITER": {
+        "INITIAL": 4,
+        "MINIMUM": 1,
+        "MAXIMUM": 32,
+        # Limit multiplier on 429/5xx
+        "BACKOFF": 0.5,
+        # Requests slower than this don't grow the limit
+        "SLOW_SECONDS": 60,
+        "QUEUE_TIMEOUT": 300,
+        # Pause after a 429 without Retry-After
+        "DEFAULT_RETRY_AFTER": 5,
+        "MAX_RETRIES": 3,
+    },
+    # Backlogs estimated above this many tokens are summarized in chunks
+    # that are reduced into one result (map-reduce)
+    "CHUNK_TOKENS": 6000,
+    "CHUNK_CONCURRENCY": 4,
+    # Upper bound on messages in a single room summary; a longer backlog is
+    # summarized oldest first and the rest covered by the next summary
+    "MAX_BACKLOG_MESSAGES": 2000,
+    # A room's first summary only covers its latest messages, so a cold
+    # start does not page through (and chunk) its whole history
+    "FIRST_SUMMARY_MAX_MESSAGES": 100,
+    # Estimated prompt token budget per model; contexts above it are packed
+    "CONTEXT_BUDGETS": {
+        "default": 16000,
+        "gpt-5.1": 64000,
+        "gemini-3": 64000,
+    },
+    # Rooms within all LIGHT_* limits that don't look like they need a reply
+    # are summarized with GeneralSettings.light_llm_model
+    "ROUTING": {
+        "ENABLED": True,
+        "LIGHT_MAX_MESSAGES": 15,
+        "LIGHT_MAX_TOKENS": 1500,
+        # Share of others' messages that are questions above which a reply is assumed
+        "QUESTION_RATIO": 0.3,
+    },
+    # Send a duplicate request to SECONDARY_MODEL when the primary hasn't
+    # answered within its recent PERCENTILE latency; the first valid wins
+    "HEDGING": {
+        "ENABLED": False,
+        "SECONDARY_MODEL": "gemini-3",
+        "PERCENTILE": 95,
+        # Latencies remembered per model, and needed before PERCENTILE is used
+        "WINDOW": 200,
+        "MIN_SAMPLES": 20,
+        "DEFAULT_DELAY_SECONDS": 30,
+        "MIN_DELAY_SECONDS": 5,
+    },
+    # Requested summaries fall back to a local extractive summary, flagged
+    # as degraded, when the provider fails or takes longer than this
+    "FALLBACK": {
+        "ENABLED": True,
+        "DEADLINE_SECONDS": 90,
+    },
+    # Cache of structured LLM results keyed by model + context
+    "CACHE": {
+        "ENABLED": True,
+        "TTL_SECONDS": 24 * 60 * 60,
+        "MAX_ENTRIES": 5000,
+    },
+    # Pack several small room contexts into one request for "summary all"
+    "BATCH": {
+        "ENABLED": True,
+        "MAX_ROOMS": 6,
+        # Rooms estimated above this are summarized with their own request
+        "MAX_ROOM_TOKENS": 1500,
+        "MAX_BATCH_TOKENS": 8000,
+    },
+    # Stream single-room summaries into a message that is edited in place
+    "STREAM": {
+        "ENABLED": True,
+        # Minimum seconds between edits of the in-progress message
+        "EDIT_INTERVAL_SECONDS": 1.5,
+    },
+    # USD per million tokens, used to record the cost of each summary; e.g.
+    # "gpt-5.1": {"PROMPT": 1.25, "COMPLETION": 10.0}. Models not listed
+    # are recorded without a cost.
+    "PRICING": {},
+    # Record every LLMService.process call (context, response, latency,
+    # tokens) to gzip JSONL for replay_llm_journal. Journals hold full
+    # conversations, so this is off by default.
+    "JOURNAL": {
+        "ENABLED": False,
+        "DIRECTORY": BASE_DIR / "llm_journal",
+    },
+}
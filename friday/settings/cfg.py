@@ -35,9 +35,25 @@ MATRIX_CONFIG = {
     'HOMESERVER': MATRIX_HOMESERVER,
     'USERNAME': MATRIX_USERNAME,
     'PASSWORD': MATRIX_PASSWORD,
+    # Shared keep-alive connection pool for all Matrix/Synapse requests
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 60,
+    'POOL_SIZE': 32,
+    # Concurrent displayname lookups (core.services.matrix_async): multiplexed
+    # over HTTP/2 where the homeserver supports it
+    'HTTP2': True,
+    'ASYNC_MAX_CONNECTIONS': 10,
 }
 
-OPENAI_CONFIG = {
-    'API_KEY': OPENAI_API_KEY,
-    'BASE_URL': OPENAI_BASE_URL,
+# OpenAI-compatible chat completion providers, keyed by name
+LLM_PROVIDERS = {
+    'nanogpt': {
+        'BASE_URL': OPENAI_BASE_URL,
+        'API_KEY': OPENAI_API_KEY,
+        'CONNECT_TIMEOUT': 5,
+        'READ_TIMEOUT': 120,
+        'POOL_SIZE': 16,
+        # Structured output support: 'json_schema', 'json_object' or None
+        'RESPONSE_FORMAT': 'json_object',
+    },
 }